@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Compare the single-pass renderer with the original recursive two-phase pipeline,
+# on a 10k-deep tree and on a 1M-node tree
+#
+# PYTHONPATH=src python benchmarks/bench_deep.py
+
+from copy import copy
+import html
+import time
+
+from pycoyote import DIV, SPAN, TABLE, TD, TR, Component
+from pycoyote.component import SELF_CLOSING_TAGS, _is_primitive, _is_raw
+
+
+def legacy_get_virtual_dom(elements):
+    # the original recursive get_virtual_dom, which clones every primitive element
+    out_elements = list(elements)
+    while True:
+        rendered = False
+        tmp_elements = copy(out_elements)
+        out_elements.clear()
+        for current_element in tmp_elements:
+            if _is_raw(current_element) or _is_primitive(current_element):
+                out_elements.append(current_element)
+            else:
+                transformed = current_element.render()
+                if isinstance(transformed, list) or isinstance(transformed, tuple):
+                    out_elements.extend(transformed)
+                else:
+                    out_elements.append(transformed)
+                rendered = True
+        if not rendered:
+            break
+    out_elements = [
+        element if _is_raw(element) else element.clone() for element in out_elements
+    ]
+    for element in out_elements:
+        if _is_raw(element):
+            continue
+        element.children = legacy_get_virtual_dom(element.children)
+    return out_elements
+
+
+def legacy_get_actual_prop_value(prop_name, prop_value):
+    # the original prop serialization
+    if prop_name == "class":
+        if isinstance(prop_value, tuple) or isinstance(prop_value, list):
+            return True, prop_name, " ".join([str(i) for i in prop_value])
+        return True, prop_name, str(prop_value)
+    if prop_name == "style":
+        if isinstance(prop_value, dict):
+            r = []
+            for k, v in prop_value.items():
+                str_v = f"{html.escape(str(v))}"
+                r.append(f"{k}:{str_v}")
+            return False, prop_name, ';'.join(r)
+        else:
+            return False, prop_name, html.escape(str(prop_value))
+    return True, prop_name, str(prop_value)
+
+
+def legacy_get_physical_dom(element):
+    # the original recursive get_physical_dom, which concatenates strings at every level
+    out = f"<{element.cyo_tag}"
+    for prop_name, prop_value in element.props.items():
+        escape, actual_prop_name, actual_prop_value = legacy_get_actual_prop_value(prop_name, prop_value)
+        if escape:
+            v = f"{actual_prop_name}=\"{html.escape(actual_prop_value)}\""
+        else:
+            v = f"{actual_prop_name}=\"{actual_prop_value}\""
+        out += f" {v}"
+    if len(element.children) == 0 and element.cyo_tag.upper() in SELF_CLOSING_TAGS:
+        return f"{out} />"
+    out += ">"
+    for child in element.children:
+        if _is_primitive(child):
+            out += legacy_get_physical_dom(child)
+        elif not child:
+            pass
+        else:
+            out += html.escape(str(child))
+    out += f"</{element.cyo_tag}>"
+    return out
+
+
+def legacy_render(component):
+    return "".join([legacy_get_physical_dom(vdom) for vdom in legacy_get_virtual_dom([component])])
+
+
+class Cell(Component):
+    def render(self):
+        return TD({"class": "cell"}, SPAN(self.props["value"]))
+
+
+def build_deep_tree(depth=10000):
+    tree = Cell({"value": "leaf"})
+    for i in range(depth):
+        tree = DIV({"class": "level"}, tree)
+    return tree
+
+
+def build_big_tree(rows=33334):
+    # 1 + rows * (1 + 10 * 3) nodes, about 1M
+    return TABLE(*[TR(*[Cell({"value": j}) for j in range(10)]) for i in range(rows)])
+
+
+def measure(name, render, tree, nodes):
+    start = time.perf_counter()
+    try:
+        out = render(tree)
+    except RecursionError:
+        print(f"{name:<40}RecursionError")
+        return None
+    seconds = time.perf_counter() - start
+    print(f"{name:<40}{seconds * 1000:10.1f} ms{nodes / seconds / 1000:10.1f} k nodes/s")
+    return out
+
+
+def main():
+    for tree_name, tree, nodes in [
+        ("10k deep", build_deep_tree(), 10000 + 3),
+        ("1M nodes", build_big_tree(), 1 + 33334 * 31),
+    ]:
+        new = measure(f"{tree_name}, str()", str, tree, nodes)
+        old = measure(f"{tree_name}, original pipeline", legacy_render, tree, nodes)
+        assert old is None or old == new
+
+
+if __name__ == '__main__':
+    main()
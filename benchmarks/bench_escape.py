@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Compare escaping the raw children of table cells one by one with html.escape,
+# as the original get_physical_dom did, against the batch text escaping
+#
+# PYTHONPATH=src python benchmarks/bench_escape.py
+
+import html
+import timeit
+
+from pycoyote import TABLE, TD, TR
+from pycoyote.component import _get_text
+
+CELLS = {
+    "repeated short str": [("in stock", )] * 1000,
+    "unique short str": [(f"name {i}", ) for i in range(1000)],
+    "numbers": [(i * 1.5 if i % 2 else i, ) for i in range(1000)],
+    "8 mixed values": [("a", 1, "b<", 2.5, None, "x", 0, "y")] * 1000,
+}
+
+
+def per_child_escape(children):
+    out = ""
+    for child in children:
+        if not child:
+            pass
+        else:
+            out += html.escape(str(child))
+    return out
+
+
+def main():
+    number = 20
+    for category, cells in CELLS.items():
+        for children in cells:
+            assert per_child_escape(children) == _get_text(children)
+        for name, escape in [("per child html.escape", per_child_escape), ("batch", _get_text)]:
+            seconds = min(timeit.repeat(
+                lambda: [escape(children) for children in cells], number=number, repeat=5
+            ))
+            print(f"{category:<20}{name:<25}{seconds / number / len(cells) * 1e9:10.1f} ns/cell")
+
+    table = TABLE(*[TR(*[TD(*children) for children in cells]) for cells in zip(*CELLS.values())])
+    seconds = min(timeit.repeat(lambda: str(table), number=number, repeat=5))
+    print(f"{'str() of a table with all of them':<45}{seconds / number * 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Measure the time to import pycoyote in a fresh interpreter, and the memory taken
+# by each tag class once it is used, optionally failing when over a budget
+#
+# PYTHONPATH=src python benchmarks/bench_import.py
+# PYTHONPATH=src python benchmarks/bench_import.py --max-import-ms 30 --max-class-bytes 2000
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+
+def import_time_us(pycache_prefix: str) -> int:
+    """Return the cumulative import time of pycoyote reported by -X importtime
+    """
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-X", f"pycache_prefix={pycache_prefix}", "-c", "import pycoyote"],
+        env=env, stderr=subprocess.PIPE, universal_newlines=True, check=True
+    ).stderr
+    return int(re.search(r"\|\s*(\d+) \| pycoyote$", out, re.MULTILINE).group(1))
+
+
+def tag_class_bytes() -> float:
+    """Return the average memory taken by a tag class, created on first use
+    """
+    import pycoyote.component as component
+
+    names = [name for name in component._TAGS if name not in vars(component)]
+    tracemalloc.start()
+    for name in names:
+        getattr(component, name)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / len(names)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-class-bytes", type=float)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pycache_prefix:
+        # the first import compiles the modules, later ones load the bytecode like an installed package
+        import_time_us(pycache_prefix)
+        times = sorted(import_time_us(pycache_prefix) for i in range(args.repeat))
+    import_ms = times[len(times) // 2] / 1000
+    class_bytes = tag_class_bytes()
+    print(f"{'import pycoyote':<20}{import_ms:10.1f} ms (median, best {times[0] / 1000:.1f} ms)")
+    print(f"{'tag class':<20}{class_bytes:10.0f} bytes/class")
+
+    over = []
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        over.append("import time")
+    if args.max_class_bytes is not None and class_bytes > args.max_class_bytes:
+        over.append("tag class memory")
+    if over:
+        print(f"over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Measure memory per node and construction time of primitive component trees
+#
+# PYTHONPATH=src python benchmarks/bench_memory.py
+
+import gc
+import timeit
+import tracemalloc
+
+from pycoyote import SPAN, TABLE, TD, TR
+
+ROWS = 10000
+COLUMNS = 10
+NODES = 1 + ROWS * (1 + COLUMNS)
+
+
+def build_plain_table():
+    return TABLE(*[TR(*[TD(SPAN()) for j in range(COLUMNS)]) for i in range(ROWS)])
+
+
+def build_table_with_props():
+    return TABLE(*[TR(*[TD({"class": "cell"}, "x") for j in range(COLUMNS)]) for i in range(ROWS)])
+
+
+def measure_bytes(build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    tree = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return size
+
+
+def main():
+    for name, build, nodes in [
+        ("plain nodes", build_plain_table, NODES + ROWS * COLUMNS),
+        ("nodes with props", build_table_with_props, NODES),
+    ]:
+        size = measure_bytes(build)
+        seconds = min(timeit.repeat(build, number=1, repeat=5))
+        print(f"{name:<20}{size / nodes:8.1f} bytes/node{seconds / nodes * 1e9:10.1f} ns/node")
+
+
+if __name__ == '__main__':
+    main()
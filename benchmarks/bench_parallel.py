@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Measure how render_parallel scales with the number of worker processes, on a
+# report page with a 20k row table
+#
+# PYTHONPATH=src python benchmarks/bench_parallel.py
+
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
+
+from pycoyote import DIV, H1, SPAN, TABLE, TBODY, TD, TR, Component, render_parallel
+
+ROWS = 20000
+
+
+class Cell(Component):
+    def render(self):
+        return TD({"class": ["cell", "odd" if self.props["value"] % 2 else "even"]},
+            SPAN({"style": {"text-align": "right"}}, self.props["value"])
+        )
+
+
+class Row(Component):
+    def render(self):
+        return TR(*[Cell({"value": self.props["i"] * j}) for j in range(10)])
+
+
+class Report(Component):
+    def render(self):
+        return DIV(H1("Report"), TABLE(TBODY(*[Row({"i": i}) for i in range(ROWS)])))
+
+
+def main():
+    report = Report()
+    start = time.perf_counter()
+    expected = str(report)
+    serial = time.perf_counter() - start
+    print(f"{'str()':<12}{serial * 1000:10.1f} ms")
+
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # start the worker processes before measuring
+            list(executor.map(abs, range(workers)))
+            start = time.perf_counter()
+            out = render_parallel(report, executor, batch_size=ROWS // (workers * 4))
+            seconds = time.perf_counter() - start
+        assert out == expected
+        print(f"{workers:>3} workers{seconds * 1000:10.1f} ms{serial / seconds:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Compare rendering the MainPage example with literal footer/header subtrees
+# against the same page where those subtrees are wrapped in static()
+#
+# PYTHONPATH=src python benchmarks/bench_static.py
+
+import timeit
+
+from pycoyote import A, DIV, LI, SPAN, UL, Component, static
+
+
+def make_nav():
+    return UL({"class": ["nav", "main"]},
+        *[LI(A({"href": f"/section/{i}", "class": "nav-link"}, f"Section {i}")) for i in range(20)]
+    )
+
+
+def make_footer():
+    return DIV({"class": "footer", "style": {"color": "gray", "font-size": "10px"}},
+        SPAN("Copyright <pycoyote> & friends"),
+        *[A({"href": f"/legal/{i}"}, f"Legal {i}") for i in range(10)]
+    )
+
+
+STATIC_NAV = static(make_nav())
+STATIC_FOOTER = static(make_footer())
+
+
+class MainPage(Component):
+    def render(self):
+        return DIV(
+            SPAN({"class": "bold", "style": f"background-color: {self.props['color']};"},
+                "Hello world!"
+            ),
+            *self.children
+        )
+
+
+class DynamicPage(Component):
+    def render(self):
+        return MainPage({"color": self.props["color"]}, make_nav(), DIV("content"), make_footer())
+
+
+class StaticPage(Component):
+    def render(self):
+        return MainPage({"color": self.props["color"]}, STATIC_NAV, DIV("content"), STATIC_FOOTER)
+
+
+def main():
+    assert str(DynamicPage({"color": "green"})) == str(StaticPage({"color": "green"}))
+    number = 2000
+    for name, cls in [("literal subtrees", DynamicPage), ("static()", StaticPage)]:
+        seconds = min(timeit.repeat(lambda: str(cls({"color": "green"})), number=number, repeat=5))
+        print(f"{name:<20}{seconds / number * 1e6:10.1f} us/page")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+# Compare rendering the MainPage example normally and through compiled_render
+#
+# PYTHONPATH=src python benchmarks/bench_template.py
+
+import timeit
+
+from pycoyote import DIV, SPAN, Component, compiled_render
+
+
+class MainPage(Component):
+    def render(self):
+        return DIV(
+            SPAN({"class": "bold", "style": f"background-color: {self.props['color']};"},
+                "Hello world!"
+            ),
+            *self.children
+        )
+
+
+@compiled_render
+class CompiledMainPage(MainPage):
+    pass
+
+
+def main():
+    number = 20000
+    assert str(MainPage({"color": "green"}, "end")) == str(CompiledMainPage({"color": "green"}, "end"))
+    for name, cls in [("render()", MainPage), ("compiled_render", CompiledMainPage)]:
+        seconds = min(timeit.repeat(
+            lambda: str(cls({"color": "green"}, "Example ends here")), number=number, repeat=5
+        ))
+        print(f"{name:<20}{seconds / number * 1e6:10.2f} us/page")
+
+
+if __name__ == '__main__':
+    main()
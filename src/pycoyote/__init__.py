@@ -1,2 +1,50 @@
-from .component import Component
-from .component import A, ABBR, ADDRESS, AREA, ARTICLE, ASIDE, AUDIO, B, BASE, BDI, BDO, BLOCKQUOTE, BODY, BR, BUTTON, CANVAS, CAPTION, CITE, CODE, COL, COLGROUP, DATA, DATALIST, DD, DEL, DETAILS, DFN, DIALOG, DIV, DL, DT, EM, EMBED, FIELDSET, FIGCAPTION, FIGURE, FOOTER, FORM, HEAD, HEADER, HGROUP, H1, H2, H3, H4, H5, H6, HR, HTML, I, IFRAME, IMG, INPUT, INS, KBD, KEYGEN, LABEL, LEGEND, LI, LINK, MAIN, MAP, MARK, MENU, MENUITEM, META, METER, NAV, NOSCRIPT, OBJECT, OL, OPTGROUP, OPTION, OUTPUT, P, PARAM, PICTURE, PRE, PROGRESS, Q, RP, RT, RUBY, S, SAMP, SCRIPT, SECTION, SELECT, SMALL, SOURCE, SPAN, STRONG, STYLE, SUB, SUMMARY, SUP, SVG, TABLE, TBODY, TD, TEMPLATE, TEXTAREA, TFOOT, TH, THEAD, TIME, TITLE, TR, TRACK, U, UL, VAR, VIDEO, WBR
+from importlib import import_module
+from typing import Any
+
+from .component import Component, SafeHTML, iter_html, static
+from .component import register_prop_serializer, unregister_prop_serializer, serialize_aria_prop, \
+    serialize_boolean_prop, serialize_json_prop
+from .component import register_render_hook, unregister_render_hook
+from . import component as _component
+from .component import _TAGS
+from .diff import diff
+
+# names of the other modules, imported on first use since some of them pull in
+# heavy standard modules like asyncio, concurrent.futures or sqlite3
+_LAZY_NAMES = {
+    "FragmentCache": "cache",
+    "MemoryBackend": "cache",
+    "RenderCache": "cache",
+    "SqliteBackend": "cache",
+    "fragment_cached": "cache",
+    "memoized_render": "cache",
+    "compiled_render": "template",
+    "RenderRoot": "root",
+    "render_parallel": "parallel",
+    "render_threaded": "parallel",
+    "render_async": "aio",
+    "profile": "profiler",
+}
+
+__all__ = [
+    "Component", "SafeHTML", "iter_html", "static",
+    "register_prop_serializer", "unregister_prop_serializer", "serialize_aria_prop", "serialize_boolean_prop",
+    "serialize_json_prop", "register_render_hook", "unregister_render_hook", "diff",
+    *_LAZY_NAMES, *_TAGS,
+]
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_NAMES.get(name)
+    if module_name is not None:
+        value = getattr(import_module(f".{module_name}", __name__), name)
+    elif name in _TAGS:
+        value = getattr(_component, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,57 @@
+import asyncio
+import inspect
+from time import perf_counter
+from typing import Any
+
+from . import component as _component
+from .component import _iter_html, _iter_render_levels
+
+
+async def _render(element) -> Any:
+    start = perf_counter()
+    transformed = element.render()
+    if inspect.isawaitable(transformed):
+        transformed = await transformed
+    if _component._RENDER_HOOKS["on_component_render"]:
+        # the time until render() returned, including waiting for the other components
+        elapsed = perf_counter() - start
+        for callback in _component._RENDER_HOOKS["on_component_render"]:
+            callback(element, elapsed)
+    return transformed
+
+
+async def render_async(component) -> str:
+    """Render component, awaiting the components whose render() is async
+
+    The tree is expanded one level at a time, and the render() of all the components
+    of a level run concurrently, so a page with many independent widgets waits for
+    the slowest of them instead of all of them in turn. Sync render() methods are
+    called as usual. Components with a cyo_render_cache get their html from it when
+    it has an entry, they are not stored into it and templates are not used.
+
+    class Weather(Component):
+        async def render(self):
+            forecast = await fetch_forecast(self.props["city"])
+            return DIV({"class": "weather"}, forecast)
+
+    html = await render_async(Dashboard())
+    """
+    for callback in _component._RENDER_HOOKS["on_render_start"]:
+        callback([component])
+    start = perf_counter()
+    out = "".join(_iter_html([component], renders=await _render_levels(component)))
+    elapsed = perf_counter() - start
+    for callback in _component._RENDER_HOOKS["on_render_end"]:
+        callback([component], elapsed, len(out))
+    return out
+
+
+async def _render_levels(component) -> dict:
+    levels = _iter_render_levels([component])
+    try:
+        level = next(levels)
+        while True:
+            results = await asyncio.gather(*[_render(element) for element in level])
+            level = levels.send(results)
+    except StopIteration as stop:
+        return stop.value
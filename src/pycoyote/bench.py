@@ -0,0 +1,232 @@
+# Benchmark suite of the rendering pipeline
+#
+# python -m pycoyote.bench                               run all workloads
+# python -m pycoyote.bench --save baseline.json          ... and save the results
+# python -m pycoyote.bench --baseline baseline.json      ... and compare with saved ones
+#
+# Each operation builds the component tree of a workload and renders it with str(),
+# like a request handler does. With --baseline, the exit status is 1 if a workload
+# got slower than the baseline by more than --threshold.
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from .component import Component, get_virtual_dom
+from .component import A, DIV, H1, LI, P, SPAN, TABLE, TBODY, TD, TH, THEAD, TR, UL
+
+
+class MainPage(Component):
+    # the component of examples/example1.py
+    def render(self):
+        return DIV(
+            SPAN({"class": "bold", "style": f"background-color: {self.props['color']};"},
+                "Hello world!"
+            ),
+            *self.children
+        )
+
+
+class Card(Component):
+    def render(self):
+        return DIV({"class": "card"},
+            H1(self.props["title"]),
+            MainPage({"color": self.props["color"]}, P(self.props["text"])),
+            A({"href": f"/items/{self.props['id']}"}, "more"),
+        )
+
+
+class Nested(Component):
+    def render(self):
+        depth = self.props["depth"]
+        if depth == 0:
+            return SPAN("leaf")
+        return DIV({"class": "level"}, Nested({"depth": depth - 1}))
+
+
+def wide_table(scale: float) -> Any:
+    rows = max(1, int(10000 * scale))
+    return TABLE(
+        THEAD(TR(*[TH(f"column {j}") for j in range(10)])),
+        TBODY(*[TR(*[TD(i * 10 + j) for j in range(10)]) for i in range(rows)]),
+    )
+
+
+def deep_elements(scale: float) -> Any:
+    tree = SPAN("leaf")
+    for i in range(max(1, int(5000 * scale))):
+        tree = DIV({"class": "level"}, tree)
+    return tree
+
+
+def deep_components(scale: float) -> Any:
+    return Nested({"depth": max(1, int(900 * scale))})
+
+
+def component_pages(scale: float) -> Any:
+    return DIV(*[
+        Card({"id": i, "title": f"Item {i}", "color": "green", "text": f"Description of item {i}"})
+        for i in range(max(1, int(2000 * scale)))
+    ])
+
+
+def prop_heavy(scale: float) -> Any:
+    return UL(*[
+        LI({
+            "id": f"item-{i}",
+            "class": ["item", "odd" if i % 2 else "even", "active" if i % 7 == 0 else "inactive"],
+            "style": {"color": "red", "margin-left": f"{i % 10}px", "font-weight": "bold"},
+            "data-index": i,
+            "title": f"Item {i}",
+        }, f"item {i}")
+        for i in range(max(1, int(5000 * scale)))
+    ])
+
+
+def escape_heavy(scale: float) -> Any:
+    return DIV(*[
+        P(f"<b>{i}</b> & \"quoted\" 'text' with <tags> and unicode é ✓ ", f"{i} > {i - 1}")
+        for i in range(max(1, int(5000 * scale)))
+    ])
+
+
+WORKLOADS: Dict[str, Callable[[float], Any]] = {
+    "wide_table": wide_table,
+    "deep_elements": deep_elements,
+    "deep_components": deep_components,
+    "component_pages": component_pages,
+    "prop_heavy": prop_heavy,
+    "escape_heavy": escape_heavy,
+}
+
+
+def count_nodes(tree) -> int:
+    """Return the number of primitive components and text values tree renders to
+    """
+    count = 0
+    stack = [iter(get_virtual_dom([tree]))]
+    while stack:
+        for element in stack[-1]:
+            if isinstance(element, Component):
+                count += 1
+                stack.append(iter(element.children))
+                break
+            if element:
+                count += 1
+        else:
+            stack.pop()
+    return count
+
+
+def measure_memory(build: Callable[[float], Any], scale: float) -> Dict[str, int]:
+    """Return the bytes allocated for the tree of a workload, and the peak while it
+    is built and rendered
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tree = build(scale)
+        allocated, _ = tracemalloc.get_traced_memory()
+        str(tree)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"allocated_bytes": allocated, "peak_bytes": peak}
+
+
+def run_workload(build: Callable[[float], Any], scale: float, repeat: int,
+                 number: Optional[int] = None) -> Dict[str, Any]:
+    nodes = count_nodes(build(scale))
+    timer = timeit.Timer(lambda: str(build(scale)))
+    if number is None:
+        number, _ = timer.autorange()
+    seconds = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {
+        "nodes": nodes,
+        "ops_per_sec": 1 / seconds,
+        "us_per_node": seconds * 1e6 / nodes,
+        **measure_memory(build, scale),
+    }
+
+
+def run(names: List[str], scale: float = 1.0, repeat: int = 5,
+        number: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    return {name: run_workload(WORKLOADS[name], scale, repeat, number) for name in names}
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            threshold: float) -> List[str]:
+    """Return the names of the workloads slower than in baseline by more than threshold
+    """
+    return [
+        name for name, result in results.items()
+        if name in baseline and result["ops_per_sec"] < baseline[name]["ops_per_sec"] * (1 - threshold)
+    ]
+
+
+def format_results(results: Dict[str, Dict[str, Any]],
+                   baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    lines = [
+        f"{'workload':<18}{'nodes':>9}{'ops/s':>11}{'us/node':>10}{'allocated':>13}{'peak':>13}"
+        + ("" if baseline is None else f"{'vs baseline':>13}")
+    ]
+    for name, result in results.items():
+        line = (
+            f"{name:<18}{result['nodes']:>9}{result['ops_per_sec']:>11.2f}{result['us_per_node']:>10.3f}"
+            f"{result['allocated_bytes']:>13}{result['peak_bytes']:>13}"
+        )
+        if baseline is not None:
+            if name in baseline:
+                line += f"{result['ops_per_sec'] / baseline[name]['ops_per_sec']:>12.2f}x"
+            else:
+                line += f"{'-':>13}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pycoyote.bench", description="Benchmark pycoyote rendering")
+    parser.add_argument("workloads", nargs="*", metavar="workload",
+                        help=f"workloads to run, among {', '.join(WORKLOADS)}, all by default")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the size of the workloads")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per workload, the best is kept")
+    parser.add_argument("--number", type=int,
+                        help="operations per timing run, by default enough to take 0.2 s")
+    parser.add_argument("--save", metavar="PATH", help="save the results as json")
+    parser.add_argument("--baseline", metavar="PATH", help="compare with results saved by --save")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown against the baseline reported as a regression, default 0.1")
+    args = parser.parse_args(argv)
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            parser.error(f"unknown workload {name!r}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    results = run(args.workloads or list(WORKLOADS), scale=args.scale, repeat=args.repeat, number=args.number)
+    print(format_results(results, baseline))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "scale": args.scale,
+                "results": results,
+            }, f, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"slower than the baseline: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
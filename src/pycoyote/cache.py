@@ -0,0 +1,247 @@
+from collections import OrderedDict
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class MemoryBackend:
+    """Keep fragments in a bounded LRU inside the process, shared by all threads
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.__entries = OrderedDict()  # key -> (expires_at, html)
+        self.__lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[str]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            expires_at, out = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return out
+
+    def set(self, key: Any, out: str, expires_at: Optional[float]) -> None:
+        with self.__lock:
+            self.__entries[key] = (expires_at, out)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.maxsize:
+                self.__entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self.__lock:
+            keys = [
+                key for key in self.__entries if isinstance(key, str) and key.startswith(prefix)
+            ]
+            for key in keys:
+                del self.__entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+# values whose repr is the same in every process, see _get_stable_key
+_STABLE_TYPES = (str, int, float, bool, bytes, type(None))
+
+
+def _get_stable_key(key: Any) -> Optional[str]:
+    """Return a str naming key in all processes, or None if there is none
+
+    Keys that are not str, like the default cache_key() of a component, are made
+    of tuples, classes and plain values, which are named by a digest of their repr.
+    Return None if key contains anything else, whose repr may differ between
+    processes or name another value later, like "<object at 0x...>".
+    """
+    if isinstance(key, str):
+        return key
+    stack = [key]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, tuple):
+            stack.extend(value)
+        elif not isinstance(value, _STABLE_TYPES) and not isinstance(value, type):
+            return None
+    return "#" + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+
+class SqliteBackend:
+    """Keep fragments in a local sqlite database
+
+    All processes opening the same file share the fragments, for example all the
+    gunicorn workers on a host. Keys that are not str, like the default
+    cache_key(), are stored by a digest, see _get_stable_key, so only str keys can
+    be dropped by delete_prefix. Keys that have no stable digest are never cached.
+    """
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.__local = threading.local()
+        with self.__connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragments "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+
+    def __connect(self) -> sqlite3.Connection:
+        # a connection must not be shared across threads, nor across a fork
+        conn = getattr(self.__local, "conn", None)
+        if conn is None or self.__local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.__local.conn = conn
+            self.__local.pid = os.getpid()
+        return conn
+
+    def get(self, key: Any) -> Optional[str]:
+        key = _get_stable_key(key)
+        if key is None:
+            return None
+        row = self.__connect().execute(
+            "SELECT value, expires_at FROM fragments WHERE key = ?", (key, )
+        ).fetchone()
+        if row is None:
+            return None
+        out, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            with self.__connect() as conn:
+                conn.execute(
+                    "DELETE FROM fragments WHERE key = ? AND expires_at = ?", (key, expires_at)
+                )
+            return None
+        return out
+
+    def set(self, key: Any, out: str, expires_at: Optional[float]) -> None:
+        key = _get_stable_key(key)
+        if key is None:
+            return
+        with self.__connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fragments (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, out, expires_at)
+            )
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self.__connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM fragments WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+            return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        with self.__connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM fragments WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(), )
+            )
+            return cursor.rowcount
+
+    def clear(self) -> None:
+        with self.__connect() as conn:
+            conn.execute("DELETE FROM fragments")
+
+    def __len__(self):
+        return self.__connect().execute("SELECT COUNT(*) FROM fragments").fetchone()[0]
+
+
+class FragmentCache:
+    """Cache rendered html in a backend, with optional time to live
+
+    It can be used as the cyo_render_cache of a component. It counts hits and
+    misses so you can check how well it is doing. Several caches may share one
+    backend, for example one per component class with different ttl.
+    """
+    def __init__(self, backend: Any = None, ttl: Optional[float] = None):
+        self.backend = MemoryBackend() if backend is None else backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Optional[str]:
+        out = self.backend.get(key)
+        if out is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return out
+
+    def set(self, key: Any, out: str) -> None:
+        expires_at = None if self.ttl is None else time.time() + self.ttl
+        self.backend.set(key, out, expires_at)
+
+    def invalidate(self, prefix: str) -> int:
+        """Drop all fragments whose key starts with prefix, return how many were dropped
+        """
+        return self.backend.delete_prefix(prefix)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.backend)
+
+
+class RenderCache(FragmentCache):
+    """A bounded in-process LRU cache of rendered html, with optional time to live
+    """
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        super().__init__(MemoryBackend(maxsize=maxsize), ttl=ttl)
+
+
+def memoized_render(maxsize: Any = 1024, ttl: Optional[float] = None):
+    """Class decorator that caches the rendered html of a component
+
+    Use it on components that are pure functions of their props and children,
+    instances with the same cache_key() are rendered once and then copied from
+    the cache. The cache is available as cls.cyo_render_cache.
+
+    @memoized_render
+    class Footer(Component):
+        ...
+
+    @memoized_render(maxsize=100, ttl=60)
+    class NavBar(Component):
+        ...
+    """
+    if isinstance(maxsize, type):
+        # used without arguments
+        return memoized_render()(maxsize)
+
+    def decorator(cls):
+        cls.cyo_render_cache = RenderCache(maxsize=maxsize, ttl=ttl)
+        return cls
+    return decorator
+
+
+def fragment_cached(backend: Any, ttl: Optional[float] = None):
+    """Class decorator that caches the rendered html of a component in backend
+
+    The backend outlives a single request, so the component should override
+    cache_key() to return a str naming what it shows, which also allows to drop
+    related fragments with cls.cyo_render_cache.invalidate(prefix). The default
+    key works too, but its fragments can only be dropped by clear().
+
+    shared = SqliteBackend("/var/tmp/fragments.db")
+
+    @fragment_cached(shared, ttl=300)
+    class ProductCard(Component):
+        def cache_key(self):
+            return f"product:{self.props['id']}"
+        ...
+    """
+    def decorator(cls):
+        cls.cyo_render_cache = FragmentCache(backend, ttl=ttl)
+        return cls
+    return decorator
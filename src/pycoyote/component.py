@@ -1,7 +1,13 @@
 from copy import copy
+from functools import lru_cache
 import html
+import json
+import re
+from time import perf_counter
 from abc import ABC, abstractmethod
-from typing import Any, Tuple, List
+from collections import abc
+from types import CoroutineType
+from typing import Any, Callable, Generator, Iterator, Optional, Tuple, List
 
 # see http://xahlee.info/js/html5_non-closing_tag.html
 SELF_CLOSING_TAGS = set([
@@ -27,690 +33,1095 @@ def _is_raw(element) -> bool:
     return not isinstance(element, Component)
 
 
-def _get_actual_prop_value(prop_name:str, prop_value:Any) -> Tuple[bool, str, Any]:
-    """Convert prop name and value for some known props, for primitive component
-    """
-    if prop_name == "class":
-        if isinstance(prop_value, tuple) or isinstance(prop_value, list):
-            return True, prop_name, " ".join([str(i) for i in prop_value])
-        return True, prop_name, str(prop_value)
-    if prop_name == "style":
-        if isinstance(prop_value, dict):
-            r = []
-            for k, v in prop_value.items():
-                str_v = f"{html.escape(str(v))}"
-                r.append(f"{k}:{str_v}")
-            return False, prop_name, ';'.join(r)
-        else:
-            return False, prop_name, html.escape(str(prop_value))
-    return True, prop_name, str(prop_value)
-
+def _is_lazy(element) -> bool:
+    """Return True if element is an iterator of children, like a generator
 
-class Component(ABC):
-    """Represent a UI component
+    Its children are consumed once, as they are rendered, so a big list of rows
+    can be produced on demand, e.g. TBODY(Row({"row": row}) for row in cursor).
     """
-    def __init__(self, *children):
-        self.__cyo_is_primitive = False
-        if len(children) == 0:
-            self.children = []
-            self.props = {}
-        else:
-            if isinstance(children[0], dict):
-                self.props = copy(children[0])
-                self.children = children[1:]
-            else:
-                self.children = copy(children)
-                self.props = {}
-
-    @abstractmethod
-    def render(self):
-        raise NotImplementedError("Component must overwrite render method!")
-
-    def __str__(self):
-        return "".join([
-            vdom.get_physical_dom() for vdom in get_virtual_dom([self])
-        ])
-
-    @property
-    def cyo_is_primitive(self):
-        return self.__cyo_is_primitive
-
-
-class PrimitiveComponent(Component):
-    def __init__(self, tag, *children):
-        super().__init__(*children)
-        self._Component__cyo_is_primitive = True
-        self.__cyo_tag = tag
-
-    def clone(self) -> "PrimitiveComponent":
-        return self.__class__(*[self.props, *self.children])
-
-    def render(self):
-        pass
-
-    def get_physical_dom(self) -> str:
-        out = f"<{self.__cyo_tag}"
-        for prop_name, prop_value in self.props.items():
-            escape, actual_prop_name, actual_prop_value = _get_actual_prop_value(prop_name, prop_value)
-            if escape:
-                v = f"{actual_prop_name}=\"{html.escape(actual_prop_value)}\""
-            else:
-                v = f"{actual_prop_name}=\"{actual_prop_value}\""
-            out += f" {v}"
-        if len(self.children) == 0 and self.__cyo_tag.upper() in SELF_CLOSING_TAGS:
-            return f"{out} />"
-        out += ">"
-        for child in self.children:
-            # we have already assumed self has been fully rendered, so all it transitive 
-            # children are either raw or primitive element
-            if _is_primitive(child):
-                out += child.get_physical_dom()
-            elif not child:
-                # falsy does not generate any output
-                pass
-            else:
-                out += html.escape(str(child))
-        out += f"</{self.__cyo_tag}>"
-        return out
-
-
-def get_virtual_dom(elements: List[Any]) -> List[Any]:
-    out_elements = list(elements)
-    while True:
-        rendered = False
-        tmp_elements = copy(out_elements)
-        out_elements.clear()
-        for current_element in tmp_elements:
-            if _is_raw(current_element):
-                out_elements.append(current_element)
-            elif _is_primitive(current_element):
-                out_elements.append(current_element)
-            else:
-                transformed = current_element.render()
-                if isinstance(transformed, list) or isinstance(transformed, tuple):
-                    out_elements.extend(transformed)
-                else:
-                    out_elements.append(transformed)
-                rendered = True
-        if not rendered:
-            break
-    # out_element should only contain primitive elements or raw elements
-    out_elements = [
-        element if _is_raw(element) else element.clone() for element in out_elements
-    ]
-    for element in out_elements:
-        if _is_raw(element):
-            continue
-        element.children = get_virtual_dom(element.children)
-    return out_elements
-
-
-class A(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("a", *children)
-
-
-class ABBR(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("abbr", *children)
-
-
-class ADDRESS(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("address", *children)
-
-
-class AREA(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("area", *children)
-
-
-class ARTICLE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("article", *children)
-
-
-class ASIDE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("aside", *children)
-
-
-class AUDIO(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("audio", *children)
-
-
-class B(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("b", *children)
-
-
-class BASE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("base", *children)
-
-
-class BDI(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("bdi", *children)
-
-
-class BDO(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("bdo", *children)
-
-
-class BLOCKQUOTE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("blockquote", *children)
-
-
-class BODY(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("body", *children)
-
-
-class BR(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("br", *children)
-
-
-class BUTTON(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("button", *children)
-
-
-class CANVAS(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("canvas", *children)
-
-
-class CAPTION(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("caption", *children)
-
-
-class CITE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("cite", *children)
-
-
-class CODE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("code", *children)
-
-
-class COL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("col", *children)
-
-
-class COLGROUP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("colgroup", *children)
-
-
-class DATA(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("data", *children)
-
-
-class DATALIST(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("datalist", *children)
-
-
-class DD(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("dd", *children)
-
-
-class DEL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("del", *children)
-
-
-class DETAILS(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("details", *children)
-
-
-class DFN(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("dfn", *children)
-
-
-class DIALOG(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("dialog", *children)
-
-
-class DIV(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("div", *children)
-
-
-class DL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("dl", *children)
-
-
-class DT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("dt", *children)
-
-
-class EM(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("em", *children)
-
-
-class EMBED(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("embed", *children)
-
-
-class FIELDSET(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("fieldset", *children)
-
-
-class FIGCAPTION(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("figcaption", *children)
-
-
-class FIGURE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("figure", *children)
-
-
-class FOOTER(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("footer", *children)
-
-
-class FORM(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("form", *children)
-
-
-class HEAD(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("head", *children)
-
-
-class HEADER(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("header", *children)
-
-
-class HGROUP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("hgroup", *children)
-
-
-class H1(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("h1", *children)
-
-
-class H2(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("h2", *children)
-
-
-class H3(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("h3", *children)
-
-
-class H4(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("h4", *children)
-
-
-class H5(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("h5", *children)
-
+    return element.__class__ is not str and isinstance(element, abc.Iterator)
 
-class H6(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("h6", *children)
-
-
-class HR(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("hr", *children)
-
-
-class HTML(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("html", *children)
-
-
-class I(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("i", *children)
-
-
-class IFRAME(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("iframe", *children)
-
-
-class IMG(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("img", *children)
-
-
-class INPUT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("input", *children)
-
-
-class INS(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("ins", *children)
-
-
-class KBD(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("kbd", *children)
-
-
-class KEYGEN(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("keygen", *children)
-
-
-class LABEL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("label", *children)
-
-
-class LEGEND(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("legend", *children)
-
-
-class LI(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("li", *children)
-
-
-class LINK(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("link", *children)
-
-
-class MAIN(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("main", *children)
-
-
-class MAP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("map", *children)
-
-
-class MARK(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("mark", *children)
 
+@lru_cache(maxsize=4096)
+def _escape_attribute(value: str) -> str:
+    """html.escape with a bounded cache, for attribute values that keep coming back
+    """
+    return html.escape(value)
 
-class MENU(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("menu", *children)
 
+def _serialize_class_prop(prop_name: str, prop_value: Any) -> str:
+    """Serialize class, which can be given as a list or tuple of class names
+    """
+    if isinstance(prop_value, tuple) or isinstance(prop_value, list):
+        return _escape_attribute(" ".join([str(i) for i in prop_value]))
+    return _escape_attribute(str(prop_value))
 
-class MENUITEM(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("menuitem", *children)
 
+def _serialize_style_prop(prop_name: str, prop_value: Any) -> str:
+    """Serialize style, which can be given as a dict of property names to values
+    """
+    if isinstance(prop_value, dict):
+        return ";".join([f"{k}:{_escape_attribute(str(v))}" for k, v in prop_value.items()])
+    return _escape_attribute(str(prop_value))
 
-class META(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("meta", *children)
 
+def _serialize_prop(prop_name: str, prop_value: Any) -> str:
+    """Default serializer, for props without a registered one
+    """
+    return _escape_attribute(str(prop_value))
 
-class METER(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("meter", *children)
 
+def serialize_boolean_prop(prop_name: str, prop_value: Any) -> Optional[str]:
+    """Serializer for boolean attributes like disabled, present only if the value is truthy
+    """
+    return "" if prop_value else None
 
-class NAV(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("nav", *children)
 
+def serialize_aria_prop(prop_name: str, prop_value: Any) -> str:
+    """Serializer for aria-* attributes, True and False become "true" and "false"
+    """
+    if prop_value is True or prop_value is False:
+        return "true" if prop_value else "false"
+    return _escape_attribute(str(prop_value))
 
-class NOSCRIPT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("noscript", *children)
 
+def serialize_json_prop(prop_name: str, prop_value: Any) -> str:
+    """Serializer for data-* attributes, values other than str are encoded as json
+    """
+    if isinstance(prop_value, str):
+        return _escape_attribute(prop_value)
+    return _escape_attribute(json.dumps(prop_value))
 
-class OBJECT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("object", *children)
 
+# prop name -> serializer, a serializer is called with the prop name and value and
+# returns the escaped attribute value, or None to leave the attribute out
+_PROP_SERIALIZERS = {
+    "class": _serialize_class_prop,
+    "style": _serialize_style_prop,
+}
+# (prefix, serializer), for serializers registered with a name ending with "*"
+_PROP_PREFIX_SERIALIZERS = []
 
-class OL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("ol", *children)
+# (prop name, prop value) -> serialized attribute, the cache is emptied when full
+_PROP_CACHE_SIZE = 4096
+_prop_cache = {}
 
 
-class OPTGROUP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("optgroup", *children)
+def register_prop_serializer(prop_name: str, serializer: Callable[[str, Any], Optional[str]]) -> None:
+    """Use serializer for props named prop_name
 
+    prop_name may end with "*" to match all props starting with the rest of it, e.g.
+    register_prop_serializer("data-*", serialize_json_prop). A serializer is called
+    with the prop name and value and must return the escaped attribute value, or
+    None to leave the attribute out.
+    """
+    unregister_prop_serializer(prop_name)
+    if prop_name.endswith("*"):
+        _PROP_PREFIX_SERIALIZERS.append((prop_name[:-1], serializer))
+    else:
+        _PROP_SERIALIZERS[prop_name] = serializer
 
-class OPTION(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("option", *children)
 
+def unregister_prop_serializer(prop_name: str) -> None:
+    """Remove the serializer registered for prop_name, if any
+    """
+    if prop_name.endswith("*"):
+        _PROP_PREFIX_SERIALIZERS[:] = [
+            (prefix, serializer) for prefix, serializer in _PROP_PREFIX_SERIALIZERS
+            if prefix != prop_name[:-1]
+        ]
+    else:
+        _PROP_SERIALIZERS.pop(prop_name, None)
+    _prop_cache.clear()
+
+
+def _get_prop_serializer(prop_name: str) -> Callable[[str, Any], Optional[str]]:
+    serializer = _PROP_SERIALIZERS.get(prop_name)
+    if serializer is not None:
+        return serializer
+    for prefix, serializer in _PROP_PREFIX_SERIALIZERS:
+        if prop_name.startswith(prefix):
+            return serializer
+    return _serialize_prop
+
+
+def _get_attribute(prop_name: str, prop_value: Any) -> str:
+    """Return the attribute for a prop, including the leading space, e.g. ' class="x"'
+    """
+    # the types are part of the key since 1, 1.0 and True are equal but render differently
+    value_class = prop_value.__class__
+    if value_class is str or value_class is int or value_class is bool or value_class is float:
+        key = (prop_name, value_class, prop_value)
+    elif value_class is list or value_class is tuple:
+        key = (prop_name, value_class, tuple(prop_value), tuple(map(type, prop_value)))
+    elif value_class is dict:
+        key = (prop_name, value_class, tuple(prop_value.items()), tuple(map(type, prop_value.values())))
+    else:
+        key = None
+    if key is not None:
+        try:
+            out = _prop_cache.get(key)
+        except TypeError:
+            # something in the value cannot be hashed
+            key = None
+        else:
+            if out is not None:
+                return out
+
+    value = _get_prop_serializer(prop_name)(prop_name, prop_value)
+    out = "" if value is None else f" {prop_name}=\"{value}\""
+    if key is not None:
+        if len(_prop_cache) >= _PROP_CACHE_SIZE:
+            _prop_cache.clear()
+        _prop_cache[key] = out
+    return out
+
+
+def _freeze(value) -> Any:
+    """Convert value into a hashable key that tells apart values rendering differently
+
+    The key is a flat tuple, built with an explicit stack, so neither building nor
+    hashing it is limited by the depth of value: a component is its class followed
+    by its props and children, a dict, list or tuple is its class and length
+    followed by its items, anything else is its class and itself.
+    Raise TypeError if value contains something that cannot be hashed.
+    """
+    key = []
+    stack = [value]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Component):
+            key.append(value.__class__)
+            stack.append(value.children)
+            stack.append(value.props)
+        elif isinstance(value, dict):
+            key.append(dict)
+            key.append(len(value))
+            for item in reversed(list(value.items())):
+                stack.extend(reversed(item))
+        elif isinstance(value, list) or isinstance(value, tuple):
+            key.append(value.__class__)
+            key.append(len(value))
+            stack.extend(reversed(value))
+        elif _is_lazy(value):
+            raise TypeError("lazy children cannot be part of a key")
+        else:
+            # 1, 1.0 and True are equal but render differently, so the type is part of the key
+            hash(value)
+            key.append(value.__class__)
+            key.append(value)
+    return tuple(key)
 
-class OUTPUT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("output", *children)
 
+class _EmptyProps(dict):
+    """An empty dict that cannot be changed, the props of all components created
+    without props, see Component
+    """
+    __slots__ = ()
 
-class P(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("p", *children)
+    def __reduce__(self):
+        # pickle and copy give back the shared instance
+        return "_EMPTY_PROPS"
 
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(
+            "the props of a component created without props are shared and cannot be changed, "
+            "replace self.props or set cyo_copy_props = True on the class"
+        )
 
-class PARAM(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("param", *children)
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
 
 
-class PICTURE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("picture", *children)
+_EMPTY_PROPS = _EmptyProps()
 
 
-class PRE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("pre", *children)
+class Component(ABC):
+    """Represent a UI component
 
+    A subclass may set cyo_render_cache to an object with get(key) and set(key, html)
+    methods (see memoized_render and fragment_cached in pycoyote.cache), the rendered
+    html of its instances is then looked up in it by cache_key() before render() is
+    called. It may also set cyo_template to an object whose render(component) returns
+    the html of the component (see pycoyote.template.compiled_render).
+
+    The props dict and the children are kept as they are passed, not copied, and
+    components without props share one read-only empty dict, so treat props as
+    read-only and replace self.props to change them. A subclass whose code mutates
+    self.props in place sets cyo_copy_props to True, its instances then get their
+    own copy of the props, as a dict even when there is none. It is the default for
+    subclasses defining their own __init__, which often fills in self.props, set
+    cyo_copy_props to False on them to share the props.
+    """
+    __slots__ = ("props", "children")
+    cyo_is_primitive = False
+    cyo_render_cache = None
+    cyo_template = None
+    cyo_copy_props = False
 
-class PROGRESS(PrimitiveComponent):
     def __init__(self, *children):
-        super().__init__("progress", *children)
-
+        if len(children) == 0:
+            self.children = ()
+            self.props = {} if self.cyo_copy_props else _EMPTY_PROPS
+        elif isinstance(children[0], dict):
+            self.props = copy(children[0]) if self.cyo_copy_props else children[0]
+            self.children = children[1:]
+        else:
+            self.children = children
+            self.props = {} if self.cyo_copy_props else _EMPTY_PROPS
 
-class Q(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("q", *children)
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "__init__" in vars(cls) and "cyo_copy_props" not in vars(cls):
+            cls.cyo_copy_props = True
 
+    @abstractmethod
+    def render(self):
+        raise NotImplementedError("Component must overwrite render method!")
 
-class RP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("rp", *children)
+    def __str__(self):
+        return "".join(_iter_page([self]))
+
+    def to_html(self, minify: bool = False) -> str:
+        """Return the html of this component, like str()
+
+        With minify, optional end tags and attribute quotes are left out, boolean
+        attributes are bare and whitespace in text is collapsed outside of pre,
+        textarea, script and style, which gives a smaller html for the same page.
+        """
+        return "".join(_iter_page([self], minify))
+
+    def __html__(self):
+        # lets Jinja2 and MarkupSafe use the rendered html as is, without escaping it
+        return "".join(_iter_page([self]))
+
+    def render_to(self, writer, chunk_size: int = 8192, minify: bool = False) -> None:
+        """Render the html of this component into writer
+
+        writer can be anything with a write(str) method, such as an opened text
+        file, io.StringIO or a response body. Output is written in chunks of about
+        chunk_size characters while the tree is being rendered. See to_html for
+        minify.
+        """
+        write = writer.write
+        for chunk in iter_html(self, chunk_size=chunk_size, minify=minify):
+            write(chunk)
+
+    def cache_key(self) -> Any:
+        """Return the key of the rendered html of this component in cyo_render_cache
+
+        The default key covers the class, props and children, which is right for a
+        component that is a pure function of them. Override it to return a cheaper
+        key, or None to skip the cache for this instance.
+        """
+        try:
+            return _freeze(self)
+        except TypeError:
+            return None
+
+
+class SafeHTML(str):
+    """Html that is already escaped and serialized, it is output as is
+
+    Use it to embed a trusted html fragment as a child, e.g. DIV(SafeHTML(markdown_html)).
+    Any other child with a __html__ method, like markupsafe.Markup, is output as
+    returned by that method.
+    """
+    def __html__(self):
+        return self
 
 
-class RT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("rt", *children)
+class PrimitiveComponent(Component):
+    """Represent a html element, the tag is given by the class attribute cyo_tag
 
+    To add a custom element, derive from it and set cyo_tag:
 
-class RUBY(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("ruby", *children)
+    class MYWIDGET(PrimitiveComponent):
+        __slots__ = ()
+        cyo_tag = "my-widget"
 
+    Subclasses without __slots__ that pass the tag first to __init__, as they did
+    before cyo_tag, keep working: super().__init__("my-widget", *children).
+    """
+    __slots__ = ()
+    cyo_is_primitive = True
+    cyo_tag = None
+    cyo_copy_props = False
+
+    def __init__(self, *children):
+        if self.cyo_tag is None:
+            if not children or not isinstance(children[0], str) or not hasattr(self, "__dict__"):
+                raise TypeError(
+                    f"{self.__class__.__name__} has no tag, set its cyo_tag class attribute, e.g. cyo_tag = \"my-widget\""
+                )
+            self.cyo_tag = children[0]
+            children = children[1:]
+        super().__init__(*children)
 
-class S(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("s", *children)
+    def clone(self) -> "PrimitiveComponent":
+        """Return a new element with the same props and children, which are shared
+        """
+        cls = self.__class__
+        element = cls.__new__(cls)
+        element.props = copy(self.props) if self.cyo_copy_props else self.props
+        element.children = self.children
+        attributes = getattr(self, "__dict__", None)
+        if attributes:
+            element.__dict__.update(attributes)
+        return element
 
+    def render(self):
+        pass
 
-class SAMP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("samp", *children)
+    def get_start_tag(self) -> str:
+        """Return the start tag without the closing ">", e.g. '<div class="x"'
+        """
+        props = self.props
+        if not props:
+            return "<" + self.cyo_tag
+        return "<" + self.cyo_tag + "".join([
+            _get_attribute(prop_name, prop_value) for prop_name, prop_value in props.items()
+        ])
 
+    def get_physical_dom(self, minify: bool = False) -> str:
+        # all fragments go to a single buffer which is joined once, instead of
+        # building a new string at every nesting level
+        return "".join(_iter_page([self], minify))
 
-class SCRIPT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("script", *children)
 
+def get_virtual_dom(elements: List[Any]) -> List[Any]:
+    """Render elements until they only contain primitive components and raw values
 
-class SECTION(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("section", *children)
+    Subtrees that contain no non-primitive component are shared with elements
+    instead of being copied, only the primitive components above a non-primitive
+    one are cloned, so elements themselves are never modified. Treat the returned
+    tree as read-only. Lazy children are consumed into lists.
+    """
+    return list(_get_virtual_children(elements))
 
 
-class SELECT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("select", *children)
+def _render_non_primitives(elements) -> Tuple[Any, bool]:
+    """Render the non-primitive components in elements until there is none left
 
+    Lazy children are consumed into the list. Return the new elements and True, or
+    elements itself and False if there was nothing to render.
+    """
+    out_elements = elements
+    changed = False
+    while True:
+        for element in out_elements:
+            if _is_non_primitive(element) or _is_lazy(element):
+                break
+        else:
+            return out_elements, changed
+        tmp_elements = out_elements
+        out_elements = []
+        for current_element in tmp_elements:
+            if _is_non_primitive(current_element):
+                out_elements.extend(_get_rendered_elements(current_element))
+            elif _is_lazy(current_element):
+                out_elements.extend(current_element)
+            else:
+                out_elements.append(current_element)
+        changed = True
 
-class SMALL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("small", *children)
 
+def _get_virtual_children(elements) -> Any:
+    """Return the virtual dom of elements, or elements itself if nothing needs rendering
 
-class SOURCE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("source", *children)
+    The tree is walked with an explicit stack so its depth is not limited by the
+    recursion limit. Each frame is [elements, changed, index of the child being
+    visited], a frame's elements are copied before its first change.
+    """
+    stack = [[*_render_non_primitives(elements), 0]]
+    while True:
+        frame = stack[-1]
+        out_elements = frame[0]
+        i = frame[2]
+        while i < len(out_elements):
+            element = out_elements[i]
+            if not isinstance(element, Component) or not element.children:
+                i += 1
+                continue
+            children, changed = _render_non_primitives(element.children)
+            for child in children:
+                if isinstance(child, Component) and child.children:
+                    break
+            else:
+                # a leaf level, there is nothing to visit below it
+                if changed:
+                    _replace_children(frame, i, children)
+                i += 1
+                continue
+            break
+        if i < len(out_elements):
+            frame[2] = i
+            stack.append([children, changed, 0])
+            continue
 
+        # all children of the frame are done
+        stack.pop()
+        out_elements = frame[0]
+        if not stack:
+            return out_elements
+        parent = stack[-1]
+        i = parent[2]
+        if out_elements is not parent[0][i].children:
+            _replace_children(parent, i, out_elements)
+        parent[2] = i + 1
 
-class SPAN(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("span", *children)
 
+def _replace_children(frame, i: int, children) -> None:
+    """Replace the element at index i of the frame by a clone with the given children
+    """
+    # copy on write, the elements are shared with the caller
+    if not frame[1]:
+        frame[0] = list(frame[0])
+        frame[1] = True
+    element = frame[0][i].clone()
+    element.children = children
+    frame[0][i] = element
+
+
+# the active Profile while pycoyote.profile() is used, see _iter_page
+_profiler = None
+
+_RENDER_HOOKS = {
+    "on_render_start": [],
+    "on_render_end": [],
+    "on_component_render": [],
+}
+# True when there is an on_render_start or on_render_end hook
+_page_hooks = False
+
+
+def register_render_hook(event: str, callback: Callable[..., None]) -> None:
+    """Call callback at event, one of:
+
+    on_render_start       callback(elements), before a page is rendered
+    on_render_end         callback(elements, elapsed, size), after a page is rendered,
+                          with the seconds since it started and the number of
+                          characters of its html
+    on_component_render   callback(component, elapsed), after each render() of a
+                          non-primitive component while rendering a page, with
+                          the seconds it took
+
+    A page is rendered by str(), __html__, iter_html, render_to or get_physical_dom,
+    and by RenderRoot.html(), render_async, render_threaded and render_parallel.
+    The components render_parallel renders in other processes are not reported.
+    on_render_end is not called if rendering fails or the output is not consumed
+    to the end. Count on_component_render calls to know the size of the tree.
+    """
+    if event not in _RENDER_HOOKS:
+        raise ValueError(f"unknown render hook event {event!r}")
+    if callback not in _RENDER_HOOKS[event]:
+        _RENDER_HOOKS[event].append(callback)
+    _update_render_hooks()
 
-class STRONG(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("strong", *children)
 
+def unregister_render_hook(event: str, callback: Callable[..., None]) -> None:
+    """Stop calling callback at event, if it was registered
+    """
+    if event not in _RENDER_HOOKS:
+        raise ValueError(f"unknown render hook event {event!r}")
+    if callback in _RENDER_HOOKS[event]:
+        _RENDER_HOOKS[event].remove(callback)
+    _update_render_hooks()
 
-class STYLE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("style", *children)
 
+def _update_render_hooks() -> None:
+    # without hooks, nothing in the rendering path checks for them
+    global _page_hooks, _render_element
+    _page_hooks = bool(_RENDER_HOOKS["on_render_start"] or _RENDER_HOOKS["on_render_end"])
+    if _RENDER_HOOKS["on_component_render"]:
+        _render_element = _get_rendered_elements_hooked
+    else:
+        _render_element = _get_rendered_elements
 
-class SUB(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("sub", *children)
 
+def _iter_page(elements, minify: bool = False) -> Iterator[Any]:
+    """Return _iter_html(elements), or _iter_minified_html(elements) with minify,
+    through the active profiler and the render hooks if there are any
 
-class SUMMARY(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("summary", *children)
+    The profiler does not cover minified output.
+    """
+    if _profiler is None and not _page_hooks and not minify:
+        return _iter_html(elements)
+    if minify:
+        fragments = _iter_minified_html(elements)
+    elif _profiler is None:
+        fragments = _iter_html(elements)
+    else:
+        fragments = _profiler.iter_html(elements)
+    if _page_hooks:
+        return _iter_hooked(elements, fragments)
+    return fragments
+
+
+def _iter_hooked(elements, fragments: Iterator[Any]) -> Iterator[Any]:
+    for callback in _RENDER_HOOKS["on_render_start"]:
+        callback(elements)
+    start = perf_counter()
+    size = 0
+    for fragment in fragments:
+        size += len(fragment)
+        yield fragment
+    elapsed = perf_counter() - start
+    for callback in _RENDER_HOOKS["on_render_end"]:
+        callback(elements, elapsed, size)
+
+
+def _iter_html(elements, yield_components: bool = False, yield_wide: int = 0,
+               renders: Optional[dict] = None) -> Iterator[Any]:
+    """Expand and serialize elements in one depth-first pass, yielding html fragments
+
+    Non-primitive components are rendered as they are reached and their output is
+    serialized right away, so no virtual dom is built and no element is cloned.
+    The output is identical to joining get_physical_dom over get_virtual_dom.
+    The traversal keeps its own stack, each entry is a pair of children iterator
+    and the end tag to emit once those children are exhausted. Lazy children are
+    pushed on the stack as they are, and consumed as they are serialized.
+
+    With yield_components, non-primitive components are yielded as they are instead
+    of being rendered, for callers that keep track of them. With yield_wide set,
+    primitive components with at least that many children are yielded as they are
+    instead of being serialized, for callers that split the work. With renders, the
+    output of non-primitive components is taken from it, keyed by id of component,
+    see _iter_render_levels.
+    """
+    stack = [(iter(elements), None)]
+    while stack:
+        children, end_tag = stack[-1]
+        for element in children:
+            if _is_raw(element):
+                if element.__class__ is SafeHTML:
+                    yield element
+                elif element.__class__ is not str and isinstance(element, abc.Iterator):
+                    # lazy children, consumed while they are serialized
+                    stack.append((element if renders is None else iter(renders.get(id(element), element)), None))
+                    break
+                elif element:
+                    yield _escape_text(element)
+            elif element.cyo_is_primitive:
+                tag = element.cyo_tag
+                element_children = element.children
+                if len(element_children) == 0 and tag.upper() in SELF_CLOSING_TAGS:
+                    yield element.get_start_tag() + " />"
+                    continue
+                if yield_wide and len(element_children) >= yield_wide:
+                    yield element
+                    continue
+                text = _get_text(element_children)
+                if text is not None:
+                    # only text in it, no need to visit the children one by one
+                    yield f"{element.get_start_tag()}>{text}</{tag}>"
+                    continue
+                if tag.upper() in SELF_CLOSING_TAGS:
+                    element_children = _expand_void_children(element_children, renders)
+                    if len(element_children) == 0:
+                        yield element.get_start_tag() + " />"
+                        continue
+                yield element.get_start_tag() + ">"
+                stack.append((iter(element_children), f"</{tag}>"))
+                break
+            elif yield_components:
+                yield element
+            elif renders is not None:
+                stack.append((iter(renders[id(element)]), None))
+                break
+            elif element.cyo_render_cache is not None:
+                yield _render_cached(element)
+            elif element.cyo_template is not None:
+                yield element.cyo_template.render(element)
+            else:
+                stack.append((iter(_render_element(element)), None))
+                break
+        else:
+            stack.pop()
+            if end_tag is not None:
+                yield end_tag
 
 
-class SUP(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("sup", *children)
+def _expand_void_children(elements, renders: Optional[dict] = None) -> List[Any]:
+    """Return the children of a void element with their non-primitive components
+    rendered and their lazy children consumed
 
+    Whether a void element is self-closed depends on what is left, like with
+    get_virtual_dom, e.g. IMG(Comp()) is "<img />" when Comp renders nothing.
+    Components with a cyo_render_cache or cyo_template are kept as they are, their
+    html is not known before they are serialized. renders is as for _iter_html.
+    """
+    out_elements = []
+    stack = [iter(elements)]
+    while stack:
+        for element in stack[-1]:
+            if _is_raw(element):
+                if _is_lazy(element):
+                    stack.append(iter(element if renders is None else renders.get(id(element), element)))
+                    break
+                out_elements.append(element)
+            elif element.cyo_is_primitive or element.cyo_render_cache is not None or element.cyo_template is not None:
+                out_elements.append(element)
+            elif renders is not None:
+                stack.append(iter(renders[id(element)]))
+                break
+            else:
+                stack.append(iter(_render_element(element)))
+                break
+        else:
+            stack.pop()
+    return out_elements
 
-class SVG(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("svg", *children)
 
+# for each tag whose end tag may be omitted: the tags whose start tag may follow
+# the omitted end tag, and whether it may be omitted at the end of the parent,
+# see https://html.spec.whatwg.org/multipage/syntax.html#optional-tags
+_OPTIONAL_END_TAGS = {
+    "li": ({"li"}, True),
+    "dt": ({"dt", "dd"}, False),
+    "dd": ({"dt", "dd"}, True),
+    "p": ({
+        "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figcaption",
+        "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr", "main",
+        "menu", "nav", "ol", "p", "pre", "section", "table", "ul"
+    }, True),
+    "rt": ({"rt", "rp"}, True),
+    "rp": ({"rt", "rp"}, True),
+    "optgroup": ({"optgroup"}, True),
+    "option": ({"option", "optgroup"}, True),
+    "thead": ({"tbody", "tfoot"}, False),
+    "tbody": ({"tbody", "tfoot"}, True),
+    "tfoot": (set(), True),
+    "tr": ({"tr"}, True),
+    "td": ({"td", "th"}, True),
+    "th": ({"td", "th"}, True),
+}
+# the end tag of a p is kept at the end of these parents
+_P_END_TAG_PARENTS = {"a", "audio", "del", "ins", "map", "noscript", "video"}
+# whitespace is kept inside of them
+_PREFORMATTED_TAGS = {"pre", "textarea", "script", "style"}
+# attributes whose presence alone means true
+_BOOLEAN_ATTRIBUTES = {
+    "allowfullscreen", "async", "autofocus", "autoplay", "checked", "controls", "default", "defer",
+    "disabled", "formnovalidate", "inert", "ismap", "itemscope", "loop", "multiple", "muted", "nomodule",
+    "novalidate", "open", "playsinline", "readonly", "required", "reversed", "selected"
+}
+_UNQUOTED_UNSAFE = re.compile(r"[\s\"'=<>`]")
+_WHITESPACE = re.compile(r"[ \t\n\r\f]{2,}|[\t\n\r\f]")
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Replace each run of whitespace in text by a single space
+    """
+    # most text has nothing to collapse, and these scans are much cheaper than the regex
+    if "  " not in text and "\n" not in text and "\t" not in text and "\r" not in text and "\f" not in text:
+        return text
+    return _WHITESPACE.sub(" ", text)
 
-class TABLE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("table", *children)
 
+@lru_cache(maxsize=4096)
+def _minify_attribute(attribute: str) -> str:
+    """Return an attribute as returned by _get_attribute in its shortest form
+    """
+    if not attribute:
+        return attribute
+    # the value is escaped, so it has no quote in it
+    name, _, value = attribute[1:-1].partition('="')
+    if value == "" or (name.lower() in _BOOLEAN_ATTRIBUTES and value.lower() in (name.lower(), "true")):
+        return " " + name
+    if _UNQUOTED_UNSAFE.search(value) is None:
+        return f" {name}={value}"
+    return attribute
+
+
+def _get_minified_start_tag(element) -> str:
+    """Return the minified start tag of a primitive component, without the closing ">"
+    """
+    props = element.props
+    if not props:
+        return "<" + element.cyo_tag
+    return "<" + element.cyo_tag + "".join([
+        _minify_attribute(_get_attribute(prop_name, prop_value)) for prop_name, prop_value in props.items()
+    ])
 
-class TBODY(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("tbody", *children)
 
+def _get_minified_key(key: Any) -> Any:
+    """Return the key of the minified html of a component in its cyo_render_cache
+    """
+    if isinstance(key, str):
+        # keeps working with invalidate(prefix)
+        return key + "#minified"
+    return ("#minified", key)
 
-class TD(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("td", *children)
 
+def _iter_minified_html(elements) -> Iterator[str]:
+    """Like _iter_html, yielding minified html
 
-class TEMPLATE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("template", *children)
+    Optional end tags are omitted, attribute values are unquoted where it is safe,
+    boolean attributes are bare, whitespace in text is collapsed outside of pre,
+    textarea, script and style, and void elements end with ">".
 
+    An end tag that may be omitted is held back as pending until what comes next is
+    known: a start tag that allows to omit it or the end of the parent drops it,
+    anything else emits it first. Html fragments, like SafeHTML and the html of
+    cached components, and the end of the output always emit it, since what comes
+    next is unknown. Compiled templates are not used, and the minified html of
+    cached components is cached under its own key.
+    """
+    pending = None  # tag of the last closed element whose end tag is held back
+    preformatted = 0  # number of open elements whose whitespace is kept
+    # each entry is a pair of children iterator and the tag of the element whose
+    # children they are, None for the output of a non-primitive component
+    stack = [(iter(elements), None)]
+    while stack:
+        children, parent_tag = stack[-1]
+        for element in children:
+            if _is_raw(element):
+                if element.__class__ is not str and isinstance(element, abc.Iterator):
+                    stack.append((element, None))
+                    break
+                if not element:
+                    continue
+                if element.__class__ is SafeHTML or (element.__class__ is not str and hasattr(element, "__html__")):
+                    text = _escape_text(element)
+                elif preformatted:
+                    text = _escape_text(element)
+                else:
+                    text = _collapse_whitespace(_escape_text(element))
+                if pending is not None:
+                    yield f"</{pending}>"
+                    pending = None
+                yield text
+            elif element.cyo_is_primitive:
+                tag = element.cyo_tag
+                if pending is not None:
+                    if tag not in _OPTIONAL_END_TAGS[pending][0]:
+                        yield f"</{pending}>"
+                    pending = None
+                element_children = element.children
+                if len(element_children) == 0 and tag.upper() in SELF_CLOSING_TAGS:
+                    yield _get_minified_start_tag(element) + ">"
+                    continue
+                text = _get_text(element_children)
+                if text is not None:
+                    if not preformatted and tag not in _PREFORMATTED_TAGS:
+                        text = _collapse_whitespace(text)
+                    if tag in _OPTIONAL_END_TAGS:
+                        yield f"{_get_minified_start_tag(element)}>{text}"
+                        pending = tag
+                    else:
+                        yield f"{_get_minified_start_tag(element)}>{text}</{tag}>"
+                    continue
+                if tag.upper() in SELF_CLOSING_TAGS:
+                    element_children = _expand_void_children(element_children)
+                    if len(element_children) == 0:
+                        yield _get_minified_start_tag(element) + ">"
+                        continue
+                yield _get_minified_start_tag(element) + ">"
+                if tag in _PREFORMATTED_TAGS:
+                    preformatted += 1
+                stack.append((iter(element_children), tag))
+                break
+            elif element.cyo_render_cache is not None and not preformatted:
+                key = element.cache_key()
+                if key is None:
+                    stack.append((iter(_render_element(element)), None))
+                    break
+                key = _get_minified_key(key)
+                out = element.cyo_render_cache.get(key)
+                if out is None:
+                    out = "".join(_iter_minified_html(_render_element(element)))
+                    element.cyo_render_cache.set(key, out)
+                if pending is not None:
+                    yield f"</{pending}>"
+                    pending = None
+                yield out
+            elif element.cyo_render_cache is not None:
+                # whitespace must be kept, which the html without minification does
+                if pending is not None:
+                    yield f"</{pending}>"
+                    pending = None
+                yield _render_cached(element)
+            else:
+                stack.append((iter(_render_element(element)), None))
+                break
+        else:
+            stack.pop()
+            if parent_tag is None:
+                continue
+            if pending is not None:
+                if not _OPTIONAL_END_TAGS[pending][1] or (
+                    pending == "p" and (parent_tag in _P_END_TAG_PARENTS or parent_tag.upper() not in _TAGS)
+                ):
+                    yield f"</{pending}>"
+                pending = None
+            if parent_tag in _PREFORMATTED_TAGS:
+                preformatted -= 1
+            if parent_tag in _OPTIONAL_END_TAGS:
+                pending = parent_tag
+            else:
+                yield f"</{parent_tag}>"
+    if pending is not None:
+        yield f"</{pending}>"
 
-class TEXTAREA(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("textarea", *children)
 
+@lru_cache(maxsize=4096)
+def _escape_short_text(value: str) -> str:
+    return html.escape(value)
 
-class TFOOT(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("tfoot", *children)
 
+def _escape_text(value: Any) -> str:
+    """Escape a raw child, numbers are never escaped and short strings are cached
+    """
+    value_class = value.__class__
+    if value_class is str:
+        if len(value) <= 64:
+            return _escape_short_text(value)
+        return html.escape(value)
+    if value_class is int or value_class is float:
+        return str(value)
+    if hasattr(value, "__html__"):
+        return value.__html__()
+    return html.escape(str(value))
+
+
+def _get_text(elements) -> Optional[str]:
+    """Return the escaped text of elements if they are all str, numbers or falsy
+
+    The values are joined and escaped once. Return None if elements contains
+    anything else, in which case they have to be visited one by one.
+    """
+    if len(elements) == 1:
+        # the most common case, a cell with a single value
+        element = elements[0]
+        element_class = element.__class__
+        if element_class is str:
+            if len(element) <= 64:
+                return _escape_short_text(element)
+            return html.escape(element)
+        if element_class is int or element_class is float:
+            return str(element) if element else ""
+        if element is None or element is False:
+            return ""
+        return None
+    parts = []
+    escape = False
+    for element in elements:
+        element_class = element.__class__
+        if element_class is str:
+            parts.append(element)
+            escape = True
+        elif element_class is int or element_class is float:
+            if element:
+                parts.append(str(element))
+        elif element is None or element is False:
+            pass
+        else:
+            return None
+    if escape:
+        return _escape_text("".join(parts))
+    return "".join(parts)
 
-class TH(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("th", *children)
 
+def _get_rendered_elements(element) -> Any:
+    """Call render of a non-primitive component, always return a list or tuple
+    """
+    transformed = element.render()
+    if isinstance(transformed, list) or isinstance(transformed, tuple):
+        return transformed
+    if transformed.__class__ is CoroutineType:
+        transformed.close()
+        raise TypeError(
+            f"{element.__class__.__name__}.render() is async, render it with render_async"
+        )
+    return (transformed, )
+
+
+def _get_rendered_elements_hooked(element) -> Any:
+    """_get_rendered_elements, calling the on_component_render hooks
+    """
+    start = perf_counter()
+    transformed = _get_rendered_elements(element)
+    elapsed = perf_counter() - start
+    for callback in _RENDER_HOOKS["on_component_render"]:
+        callback(element, elapsed)
+    return transformed
 
-class THEAD(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("thead", *children)
 
+# renders a non-primitive component for _iter_html, see _update_render_hooks
+_render_element = _get_rendered_elements
 
-class TIME(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("time", *children)
 
+def _find_components(elements, renders: dict) -> List[Any]:
+    """Return the non-primitive components in elements, not looking inside them
 
-class TITLE(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("title", *children)
+    Components whose html is in their cyo_render_cache get it recorded in renders
+    instead of being returned. Each component is returned once. Lazy children are
+    consumed and recorded in renders as a tuple.
+    """
+    found = []
+    stack = [iter(elements)]
+    while stack:
+        for element in stack[-1]:
+            if _is_raw(element):
+                if _is_lazy(element) and id(element) not in renders:
+                    # the components in it are needed now, keep them for _iter_html
+                    children = renders[id(element)] = tuple(element)
+                    stack.append(iter(children))
+                    break
+                continue
+            if element.cyo_is_primitive:
+                stack.append(iter(element.children))
+                break
+            if id(element) in renders:
+                continue
+            if element.cyo_render_cache is not None:
+                key = element.cache_key()
+                out = None if key is None else element.cyo_render_cache.get(key)
+                if out is not None:
+                    renders[id(element)] = (SafeHTML(out), )
+                    continue
+            renders[id(element)] = None
+            found.append(element)
+        else:
+            stack.pop()
+    return found
 
 
-class TR(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("tr", *children)
+def _iter_render_levels(elements) -> Generator[List[Any], List[Any], dict]:
+    """Expand elements one level of non-primitive components at a time
 
+    Yield the list of components of the next level, and expect the output of their
+    render() back, in order, so the caller decides how to run them. Return the dict
+    that serializes elements through _iter_html(elements, renders=...).
+    """
+    renders = {}
+    level = _find_components(elements, renders)
+    while level:
+        results = yield level
+        next_level = []
+        for element, transformed in zip(level, results):
+            if not (isinstance(transformed, list) or isinstance(transformed, tuple)):
+                transformed = (transformed, )
+            renders[id(element)] = transformed
+            next_level.extend(_find_components(transformed, renders))
+        level = next_level
+    return renders
+
+
+def _render_cached(element) -> str:
+    """Return the html of a non-primitive component through its cyo_render_cache
+    """
+    cache = element.cyo_render_cache
+    key = element.cache_key()
+    if key is None:
+        return _render_uncached(element)
+    out = cache.get(key)
+    if out is None:
+        out = _render_uncached(element)
+        cache.set(key, out)
+    return out
+
+
+def _render_uncached(element) -> str:
+    """Return the html of a non-primitive component, bypassing its cyo_render_cache
+    """
+    if element.cyo_template is not None:
+        return element.cyo_template.render(element)
+    return "".join(_iter_html(_render_element(element)))
 
-class TRACK(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("track", *children)
 
+class StaticComponent(Component):
+    """A fully static primitive subtree, serialized once when it is created
+    """
+    __slots__ = ()
+    cyo_copy_props = False
 
-class U(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("u", *children)
+    def __init__(self, *elements):
+        for element in _iter_elements(elements):
+            if _is_non_primitive(element):
+                raise ValueError(
+                    f"static() only accepts primitive components and raw values, got {element.__class__.__name__}"
+                )
+        super().__init__(SafeHTML("".join(_iter_html(elements))))
 
+    def render(self):
+        return self.children[0]
 
-class UL(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("ul", *children)
 
+def _iter_elements(elements) -> Iterator[Any]:
+    """Yield elements and all their transitive children, without rendering anything
+    """
+    stack = list(elements)
+    while stack:
+        element = stack.pop()
+        yield element
+        if _is_primitive(element):
+            stack.extend(element.children)
 
-class VAR(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("var", *children)
 
+def static(*elements) -> StaticComponent:
+    """Serialize a subtree made of literal primitive components and raw values once
 
-class VIDEO(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("video", *children)
+    The returned component can be used anywhere in a tree and renders by copying
+    the html, create it once at module level and reuse it across requests, e.g.
+    FOOTER = static(DIV({"class": "footer"}, SPAN("(c) pycoyote")))
+    """
+    return StaticComponent(*elements)
 
 
-class WBR(PrimitiveComponent):
-    def __init__(self, *children):
-        super().__init__("wbr", *children)
+def iter_html(component, chunk_size: int = 8192, minify: bool = False) -> Iterator[str]:
+    """Yield the html of component as it is rendered
 
+    Fragments are buffered and yielded once at least chunk_size characters are
+    collected, the last chunk may be shorter. The generator can be handed to a
+    WSGI/ASGI streaming response so the top of the page goes out while the rest
+    is still rendering. See Component.to_html for minify.
+    """
+    buffer = []
+    size = 0
+    for fragment in _iter_page([component], minify):
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+# the class of each html tag, e.g. DIV for "div", is created on first use
+_TAGS = {tag.upper(): tag for tag in """
+    a abbr address area article aside audio b base bdi bdo blockquote body br button
+    canvas caption cite code col colgroup data datalist dd del details dfn dialog div
+    dl dt em embed fieldset figcaption figure footer form head header hgroup h1 h2 h3
+    h4 h5 h6 hr html i iframe img input ins kbd keygen label legend li link main map
+    mark menu menuitem meta meter nav noscript object ol optgroup option output p param
+    picture pre progress q rp rt ruby s samp script section select small source span
+    strong style sub summary sup svg table tbody td template textarea tfoot th thead
+    time title tr track u ul var video wbr
+""".split()}
+
+# "from pycoyote.component import *" creates all the tag classes
+__all__ = [
+    "SELF_CLOSING_TAGS", "Component", "PrimitiveComponent", "SafeHTML", "StaticComponent", "get_virtual_dom",
+    "iter_html", "static", "register_prop_serializer", "unregister_prop_serializer", "serialize_aria_prop",
+    "serialize_boolean_prop", "serialize_json_prop", "register_render_hook", "unregister_render_hook",
+    *_TAGS,
+]
+
+
+def __getattr__(name: str) -> Any:
+    tag = _TAGS.get(name)
+    if tag is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # the tag is known, so Component.__init__ is used directly, it is called for every element
+    cls = type(name, (PrimitiveComponent, ), {
+        "__slots__": (), "cyo_tag": tag, "cyo_copy_props": False, "__init__": Component.__init__, "__module__": __name__
+    })
+    # another thread may have created it meanwhile, there must be only one
+    return globals().setdefault(name, cls)
+
+
+def __dir__():
+    return sorted({*globals(), *_TAGS})
@@ -0,0 +1,154 @@
+from typing import Any, List, Optional, Tuple
+
+from .component import Component, SafeHTML, _escape_text, _get_attribute, _get_prop_serializer, _iter_html
+
+
+def _get_dom_children(elements) -> Tuple[List[Any], bool]:
+    """Return the nodes the browser builds for elements
+
+    A node is either a primitive component or a str holding the escaped text of a
+    text node, adjacent raw values are merged into one text node and falsy values
+    are dropped, like they are when rendered. The bool is True if elements contain
+    html fragments (SafeHTML or anything with __html__), whose nodes are unknown.
+    """
+    nodes = []
+    text = None
+    opaque = False
+    for element in elements:
+        if isinstance(element, Component):
+            if text is not None:
+                nodes.append(text)
+                text = None
+            nodes.append(element)
+        elif element.__class__ is SafeHTML or hasattr(element, "__html__"):
+            opaque = True
+        elif element:
+            text = _escape_text(element) if text is None else text + _escape_text(element)
+    if text is not None:
+        nodes.append(text)
+    return nodes, opaque
+
+
+def _get_key(node) -> Any:
+    if isinstance(node, Component):
+        return node.props.get("key")
+    return None
+
+
+def _is_same_type(old, new) -> bool:
+    if isinstance(old, Component) and isinstance(new, Component):
+        return old.cyo_tag == new.cyo_tag
+    return isinstance(old, str) and isinstance(new, str)
+
+
+def _get_html(node) -> str:
+    if isinstance(node, Component):
+        return "".join(_iter_html([node]))
+    return node
+
+
+def _diff_attributes(path: Tuple[int, ...], old, new, patches: List[tuple]) -> None:
+    old_attributes = {name: _get_attribute(name, value) for name, value in old.props.items()}
+    for name, value in new.props.items():
+        attribute = _get_attribute(name, value)
+        if old_attributes.pop(name, None) == attribute:
+            continue
+        if attribute == "":
+            # the serializer leaves it out
+            patches.append(("remove_attribute", path, name))
+        else:
+            patches.append(("set_attribute", path, name, _get_prop_serializer(name)(name, value)))
+    for name, attribute in old_attributes.items():
+        if attribute != "":
+            patches.append(("remove_attribute", path, name))
+
+
+def _diff_children(path: Tuple[int, ...], old_nodes: List[Any], new_nodes: List[Any],
+                   patches: List[tuple]) -> List[Tuple[int, Any, Any]]:
+    """Add the patches that turn the list of old_nodes into the list of new_nodes
+
+    Return (index, old node, new node) for each node that is kept, whose content
+    still has to be compared. Nodes with a key prop are matched by key, other
+    nodes by position. The working list mirrors the children of the client as
+    the patches are applied, inserted nodes are recorded as None in it.
+    """
+    new_keys = set(key for key in map(_get_key, new_nodes) if key is not None)
+    working = list(old_nodes)
+    kept = []
+    for i, node in enumerate(new_nodes):
+        key = _get_key(node)
+        old = working[i] if i < len(working) else None
+        if key is not None:
+            j = None
+            for k in range(i, len(working)):
+                if _get_key(working[k]) == key and _is_same_type(working[k], node):
+                    j = k
+                    break
+            if j is None:
+                patches.append(("insert", path, i, _get_html(node)))
+                working.insert(i, None)
+                continue
+            if j != i:
+                patches.append(("move", path, j, i))
+                working.insert(i, working.pop(j))
+            kept.append((i, working[i], node))
+        elif old is not None and _get_key(old) is None and _is_same_type(old, node):
+            kept.append((i, old, node))
+        elif old is not None and _get_key(old) not in new_keys:
+            patches.append(("replace", path + (i, ), _get_html(node)))
+            working[i] = None
+        else:
+            patches.append(("insert", path, i, _get_html(node)))
+            working.insert(i, None)
+    for i in range(len(working) - 1, len(new_nodes) - 1, -1):
+        patches.append(("remove", path, i))
+    return kept
+
+
+def diff(old_vdom: List[Any], new_vdom: List[Any]) -> List[tuple]:
+    """Return the patches that turn the html of old_vdom into the html of new_vdom
+
+    old_vdom and new_vdom are lists as returned by get_virtual_dom. A path is a
+    tuple of child indexes, starting from the element the vdom is rendered into,
+    which has path (). Indexes count element and text nodes, like childNodes in
+    the browser. Patches are applied in order, each one is a tuple of:
+
+    ("replace", path, html)                   replace the node at path
+    ("set_attribute", path, name, value)      value is escaped already
+    ("remove_attribute", path, name)
+    ("insert", path, index, html)             insert a node as child of path
+    ("remove", path, index)                   remove the child of path at index
+    ("move", path, from_index, to_index)      move a child of path
+    ("set_html", path, html)                  replace all the children of path
+
+    Children with a "key" prop are matched by key, so reordering a keyed list
+    gives moves instead of replaced items. Children containing SafeHTML fragments
+    are replaced as a whole with set_html when they changed, since the nodes of
+    a fragment are unknown.
+    """
+    patches = []
+    stack = [((), old_vdom, new_vdom)]
+    while stack:
+        path, old_children, new_children = stack.pop()
+        old_nodes, old_opaque = _get_dom_children(old_children)
+        new_nodes, new_opaque = _get_dom_children(new_children)
+        if old_opaque or new_opaque:
+            new_html = "".join(_iter_html(new_children))
+            if "".join(_iter_html(old_children)) != new_html:
+                patches.append(("set_html", path, new_html))
+            continue
+
+        pending = []
+        for i, old, new in _diff_children(path, old_nodes, new_nodes, patches):
+            child_path = path + (i, )
+            if isinstance(new, str):
+                if old != new:
+                    patches.append(("replace", child_path, new))
+                continue
+            if old is new:
+                # a shared subtree, see get_virtual_dom
+                continue
+            _diff_attributes(child_path, old, new, patches)
+            pending.append((child_path, old.children, new.children))
+        stack.extend(reversed(pending))
+    return patches
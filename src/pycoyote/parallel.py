@@ -0,0 +1,81 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import os
+from typing import Any, Iterator, List, Optional
+
+from . import component as _component
+from .component import Component, _iter_html, _iter_render_levels
+
+
+def _render_elements(elements: List[Any]) -> str:
+    return "".join(_iter_html(elements))
+
+
+def render_parallel(component, executor: Optional[Executor] = None, min_children: int = 100,
+                    batch_size: Optional[int] = None) -> str:
+    """Render component, spreading the children of wide elements over executor
+
+    The tree is walked in this process. The children of every primitive element
+    with at least min_children children, like the rows of a big table, are split
+    in batches of batch_size which are rendered by executor, and the html is put
+    back together in order. The batches are pickled, so the components in them,
+    and what they render, must be picklable, i.e. defined at module level.
+
+    executor defaults to a ProcessPoolExecutor created for this call, pass your own
+    one to reuse its worker processes across calls. batch_size defaults to about
+    4 batches per cpu.
+    """
+    if executor is None:
+        with ProcessPoolExecutor() as executor:
+            return render_parallel(component, executor, min_children=min_children, batch_size=batch_size)
+    fragments = _iter_parallel(component, executor, min_children, batch_size)
+    if _component._page_hooks:
+        fragments = _component._iter_hooked([component], fragments)
+    return "".join(fragments)
+
+
+def _iter_parallel(component, executor: Executor, min_children: int, batch_size: Optional[int]) -> Iterator[str]:
+    parts = []
+    for fragment in _iter_html([component], yield_wide=min_children):
+        if not isinstance(fragment, Component):
+            parts.append(fragment)
+            continue
+        children = list(fragment.children)
+        size = batch_size or max(1, -(-len(children) // ((os.cpu_count() or 1) * 4)))
+        parts.append(fragment.get_start_tag() + ">")
+        for i in range(0, len(children), size):
+            parts.append(executor.submit(_render_elements, children[i:i + size]))
+        parts.append(f"</{fragment.cyo_tag}>")
+    for part in parts:
+        yield part if isinstance(part, str) else part.result()
+
+
+def render_threaded(component, executor: Optional[Executor] = None) -> str:
+    """Render component, calling the render() of each level of the tree in executor
+
+    The tree is expanded one level of non-primitive components at a time, the render()
+    of all the components of a level are submitted together and their results merged
+    back in order, so blocking I/O inside render() methods overlaps. Components with a
+    cyo_render_cache get their html from it when it has an entry, they are not stored
+    into it and templates are not used.
+
+    executor defaults to a ThreadPoolExecutor created for this call, pass your own one
+    to reuse its threads across calls.
+    """
+    if executor is None:
+        with ThreadPoolExecutor() as executor:
+            return render_threaded(component, executor)
+    fragments = _iter_threaded(component, executor)
+    if _component._page_hooks:
+        fragments = _component._iter_hooked([component], fragments)
+    return "".join(fragments)
+
+
+def _iter_threaded(component, executor: Executor) -> Iterator[str]:
+    levels = _iter_render_levels([component])
+    try:
+        level = next(levels)
+        while True:
+            level = levels.send(list(executor.map(_component._render_element, level)))
+    except StopIteration as stop:
+        renders = stop.value
+    yield from _iter_html([component], renders=renders)
@@ -0,0 +1,158 @@
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterator, Tuple
+
+from . import component as _component
+from .component import Component, _iter_html, _render_cached
+
+_ROOT = "html"
+
+
+class ComponentStats:
+    """What the components of one class cost while profiling
+
+    render_time and serialize_time are in seconds, serialize_time only covers the
+    output of render() itself, not the components it contains. nodes counts the
+    elements and text values returned by render(), bytes the utf-8 size of the html
+    emitted for them.
+    """
+    __slots__ = ("instances", "render_time", "serialize_time", "nodes", "bytes")
+
+    def __init__(self):
+        self.instances = 0
+        self.render_time = 0.0
+        self.serialize_time = 0.0
+        self.nodes = 0
+        self.bytes = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def _count_nodes(elements) -> int:
+    """Count the primitive components and raw values in elements, not looking inside
+    non-primitive components
+    """
+    count = 0
+    stack = [iter(elements)]
+    while stack:
+        for element in stack[-1]:
+            if not isinstance(element, Component):
+                if element:
+                    count += 1
+            elif element.cyo_is_primitive:
+                count += 1
+                stack.append(iter(element.children))
+                break
+        else:
+            stack.pop()
+    return count
+
+
+class Profile:
+    """Statistics of the renders done while pycoyote.profile() is active
+
+    stats maps the qualified name of each component class to its ComponentStats.
+    Components with a cyo_render_cache or cyo_template are timed as a whole as
+    render time, the components they contain are not seen.
+    """
+    def __init__(self):
+        self.stats: Dict[str, ComponentStats] = {}
+        self.__self_times: Dict[Tuple[str, ...], float] = {}  # stack of class names -> seconds
+
+    def __add_time(self, path: Tuple[str, ...], elapsed: float) -> None:
+        self.__self_times[path] = self.__self_times.get(path, 0.0) + elapsed
+
+    def __get_stats(self, element) -> Tuple[str, ComponentStats]:
+        name = element.__class__.__qualname__
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = ComponentStats()
+        stats.instances += 1
+        return name, stats
+
+    def iter_html(self, elements) -> Iterator[str]:
+        """Like _iter_html, timing every non-primitive component on the way
+        """
+        # each frame is [fragments, stats of the component, stack of class names]
+        stack = [[_iter_html(elements, yield_components=True), None, (_ROOT, )]]
+        while stack:
+            fragments, stats, path = stack[-1]
+            start = perf_counter()
+            for fragment in fragments:
+                now = perf_counter()
+                elapsed = now - start
+                self.__add_time(path, elapsed)
+                if stats is not None:
+                    stats.serialize_time += elapsed
+                if isinstance(fragment, Component):
+                    name, child_stats = self.__get_stats(fragment)
+                    child_path = path + (name, )
+                    if fragment.cyo_render_cache is not None or fragment.cyo_template is not None:
+                        if fragment.cyo_render_cache is not None:
+                            out = _render_cached(fragment)
+                        else:
+                            out = fragment.cyo_template.render(fragment)
+                        elapsed = perf_counter() - now
+                        child_stats.render_time += elapsed
+                        child_stats.bytes += len(out.encode("utf-8"))
+                        self.__add_time(child_path, elapsed)
+                        yield out
+                        start = perf_counter()
+                        continue
+                    transformed = _component._render_element(fragment)
+                    elapsed = perf_counter() - now
+                    child_stats.render_time += elapsed
+                    child_stats.nodes += _count_nodes(transformed)
+                    self.__add_time(child_path, elapsed)
+                    stack.append([_iter_html(transformed, yield_components=True), child_stats, child_path])
+                    break
+                if stats is not None:
+                    stats.bytes += len(fragment.encode("utf-8"))
+                yield fragment
+                start = perf_counter()
+            else:
+                elapsed = perf_counter() - start
+                self.__add_time(path, elapsed)
+                if stats is not None:
+                    stats.serialize_time += elapsed
+                stack.pop()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Return the stats as plain dicts, e.g. to dump them as json
+        """
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def to_collapsed(self) -> str:
+        """Return the time spent in each stack of components, in the collapsed stack
+        format of flamegraph.pl and speedscope
+
+        Each line is the stack of class names separated by ";", a space and the self
+        time in microseconds. Stacks start with "html", which holds the time spent on
+        elements outside of any component.
+        """
+        return "".join([
+            f"{';'.join(path)} {round(elapsed * 1000000)}\n"
+            for path, elapsed in self.__self_times.items()
+        ])
+
+
+@contextmanager
+def profile() -> Iterator[Profile]:
+    """Profile the renders done inside the with block, per component class
+
+    It covers str(), iter_html, render_to and get_physical_dom, in all threads.
+    When no profile is active, rendering only checks for it once per call.
+
+    with pycoyote.profile() as stats:
+        html = str(MainPage())
+    print(stats.to_dict())
+    open("render.folded", "w").write(stats.to_collapsed())
+    """
+    profiler = Profile()
+    previous = _component._profiler
+    _component._profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _component._profiler = previous
@@ -0,0 +1,156 @@
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import component as _component
+from .component import Component, _iter_html
+
+
+class _Node:
+    """A non-primitive component in a RenderRoot, with the html of its subtree
+
+    parts holds the html around the child components, as str, and the _Node of
+    each child component, in order.
+    """
+    __slots__ = ("component", "parent", "parts", "html", "dirty")
+
+    def __init__(self, component, parent: Optional["_Node"]):
+        self.component = component
+        self.parent = parent
+        self.parts = []
+        self.html = None
+        self.dirty = True
+
+
+class RenderRoot:
+    """Keep a rendered component tree and its html between renders
+
+    After update() changes the props of a component, only that component and its
+    descendants are rendered again, the html of everything else is reused.
+
+    root = RenderRoot(Dashboard())
+    html = str(root)
+    widget = next(root.components(ClockWidget))
+    root.update(widget, {"time": "12:01"})
+    html = str(root)  # only widget.render() is called
+    """
+    def __init__(self, component):
+        if not isinstance(component, Component) or component.cyo_is_primitive:
+            raise TypeError("RenderRoot needs a non-primitive component")
+        self.__nodes = {}  # id of component -> its _Node in each place it appears
+        self.__root = self.__add_node(component, None)
+
+    def __add_node(self, component, parent: Optional[_Node]) -> _Node:
+        node = _Node(component, parent)
+        self.__nodes.setdefault(id(component), []).append(node)
+        return node
+
+    def __remove_descendants(self, node: _Node) -> None:
+        stack = [part for part in node.parts if part.__class__ is _Node]
+        while stack:
+            child = stack.pop()
+            nodes = self.__nodes[id(child.component)]
+            nodes.remove(child)
+            if not nodes:
+                del self.__nodes[id(child.component)]
+            stack.extend(part for part in child.parts if part.__class__ is _Node)
+
+    def __build(self, node: _Node) -> None:
+        """Render the component of node, creating a _Node for each child component
+        """
+        self.__remove_descendants(node)
+        component = node.component
+        parts = []
+        if component.cyo_render_cache is not None or component.cyo_template is not None:
+            # rendered by its cache or template, it has no child components we know of
+            parts.append("".join(_iter_html([component])))
+        else:
+            buffer = []
+            for fragment in _iter_html(_component._render_element(component), yield_components=True):
+                if isinstance(fragment, Component):
+                    if buffer:
+                        parts.append("".join(buffer))
+                        buffer = []
+                    parts.append(self.__add_node(fragment, node))
+                else:
+                    buffer.append(fragment)
+            if buffer:
+                parts.append("".join(buffer))
+        node.parts = parts
+        node.dirty = False
+
+    def __get_html(self, node: _Node) -> str:
+        """Return the html of node, joining the html of its parts
+
+        The tree is walked with an explicit stack, like in _iter_html, so its depth is
+        not limited by the recursion limit. Each frame is [node, index of the part
+        being visited, html of the parts before it].
+        """
+        if node.html is not None:
+            return node.html
+        if node.dirty:
+            self.__build(node)
+        stack = [[node, 0, []]]
+        while stack:
+            frame = stack[-1]
+            current, i, out = frame
+            parts = current.parts
+            while i < len(parts):
+                part = parts[i]
+                if part.__class__ is not _Node:
+                    out.append(part)
+                elif part.html is not None:
+                    out.append(part.html)
+                else:
+                    break
+                i += 1
+            if i < len(parts):
+                # a child whose html must be built first
+                frame[1] = i
+                child = parts[i]
+                if child.dirty:
+                    self.__build(child)
+                stack.append([child, 0, []])
+                continue
+            current.html = "".join(out)
+            stack.pop()
+        return node.html
+
+    def html(self) -> str:
+        """Return the html of the tree, rendering only what changed since the last call
+        """
+        if _component._page_hooks:
+            return "".join(_component._iter_hooked([self.__root.component], self.__iter_html()))
+        return self.__get_html(self.__root)
+
+    def __iter_html(self) -> Iterator[str]:
+        yield self.__get_html(self.__root)
+
+    def __str__(self):
+        return self.html()
+
+    def update(self, component, props: Dict[str, Any]) -> None:
+        """Merge props into the props of component, a non-primitive component of the tree
+
+        The component is rendered again by the next html(), in each place it appears.
+        """
+        nodes = self.__nodes.get(id(component))
+        if nodes is None or nodes[0].component is not component:
+            raise ValueError("component is not in this RenderRoot")
+        component.props = {**component.props, **props}
+        for node in nodes:
+            node.dirty = True
+            while node is not None and node.html is not None:
+                node.html = None
+                node = node.parent
+
+    def components(self, cls: Any = Component) -> Iterator[Any]:
+        """Yield the non-primitive components of the tree that are instances of cls
+
+        Only components rendered by the last html() are known. A component that
+        appears in several places is yielded for each of them.
+        """
+        stack: List[_Node] = [self.__root]
+        while stack:
+            node = stack.pop()
+            if isinstance(node.component, cls):
+                yield node.component
+            stack.extend(reversed([part for part in node.parts if part.__class__ is _Node]))
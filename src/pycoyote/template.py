@@ -0,0 +1,153 @@
+import html
+import re
+from typing import Any, List, Optional, Tuple
+
+from . import component as _component
+from .component import _iter_html, _get_rendered_elements
+
+# markers are made of private use characters and ascii letters and digits, html.escape
+# leaves them alone, while str.upper() and the like would change them
+_SLOT_START = "\ue000"
+_SLOT_END = "\ue001"
+_CHILDREN = "children"
+_NOT_COMPILED = object()
+
+
+def _get_marker(generation: str, name: str) -> str:
+    return f"{_SLOT_START}{generation}{name}{_SLOT_END}"
+
+
+def _trace(cls, keys: Tuple[str, ...], generation: str, children_count: int) -> str:
+    """Render a new instance of cls whose prop values and children are markers
+    """
+    # not a render of the page, so the render hooks are not called
+    props = {key: _get_marker(generation, f"slot{i}") for i, key in enumerate(keys)}
+    children = [_get_marker(generation, _CHILDREN)] * children_count
+    element = cls(props, *children) if keys else cls(*children)
+    return "".join(_iter_html(_get_rendered_elements(element)))
+
+
+def _fill(plan: List[Any], values: List[str], children_html: str) -> str:
+    out = []
+    for part in plan:
+        if part.__class__ is str:
+            out.append(part)
+        elif part is None:
+            out.append(children_html)
+        else:
+            out.append(values[part])
+    return "".join(out)
+
+
+def _compile(cls, keys: Tuple[str, ...]) -> Optional[List[Any]]:
+    """Return the render plan of cls for props with given keys, or None if it has none
+
+    A plan is a list of static html chunks (str), prop slots (index of the prop) and
+    the children slot (None). The plan is traced with one child, and only kept if it
+    predicts the output for other markers with no child and with two children, which
+    rules out render methods that branch on the number of children or transform the
+    prop values.
+    """
+    try:
+        traced = _trace(cls, keys, "a", 1)
+        expected_none = _trace(cls, keys, "b", 0)
+        expected_two = _trace(cls, keys, "c", 2)
+    except Exception:
+        return None
+
+    plan = []
+    pattern = re.compile(f"{_SLOT_START}a(slot\\d+|{_CHILDREN}){_SLOT_END}")
+    pos = 0
+    for match in pattern.finditer(traced):
+        if match.start() > pos:
+            plan.append(traced[pos:match.start()])
+        name = match.group(1)
+        plan.append(None if name == _CHILDREN else int(name[4:]))
+        pos = match.end()
+    if pos < len(traced):
+        plan.append(traced[pos:])
+    if any(part.__class__ is str and _SLOT_START in part for part in plan):
+        return None
+
+    for generation, children_count, expected in [("b", 0, expected_none), ("c", 2, expected_two)]:
+        values = [_get_marker(generation, f"slot{i}") for i in range(len(keys))]
+        children_html = _get_marker(generation, _CHILDREN) * children_count
+        if _fill(plan, values, children_html) != expected:
+            return None
+    return plan
+
+
+def _can_fill(value: Any) -> bool:
+    """Return True if value renders the same wherever a prop marker was rendered
+    """
+    if value.__class__ is str:
+        return value != ""
+    if value.__class__ is int or value.__class__ is float:
+        return value != 0
+    return False
+
+
+class Template:
+    """Render plans of a component class, one per set of prop names
+
+    A render plan is traced from render() once, and later renders only join static
+    html chunks with the escaped prop values and the html of the children, without
+    creating any component. The first instance a plan applies to is also rendered
+    the normal way, and the plan is dropped if the outputs differ, which catches
+    render methods taking another branch for the real prop values than for the
+    markers.
+    """
+    def __init__(self):
+        self.__plans = {}
+        self.__unverified = set()  # keys of the plans not checked against a real render yet
+
+    def render(self, element) -> str:
+        props = element.props
+        key = (element.__class__, tuple(props))
+        plan = self.__plans.get(key, _NOT_COMPILED)
+        if plan is _NOT_COMPILED:
+            plan = _compile(element.__class__, key[1])
+            if plan is not None:
+                self.__unverified.add(key)
+            self.__plans[key] = plan
+        if plan is None or not all(_can_fill(value) for value in props.values()):
+            return "".join(_iter_html(_component._render_element(element)))
+        values = [html.escape(str(value)) for value in props.values()]
+        children_html = "".join(_iter_html(element.children)) if None in plan else ""
+        out = _fill(plan, values, children_html)
+        if key in self.__unverified:
+            expected = "".join(_iter_html(_component._render_element(element)))
+            if out != expected:
+                self.__plans[key] = None
+            self.__unverified.discard(key)
+            return expected
+        return out
+
+
+def compiled_render(cls):
+    """Class decorator that renders a component through a cached render plan
+
+    Use it on components whose render() always returns the same structure, where prop
+    values are only placed as they are into attributes or text, and children are only
+    passed along. For example:
+
+    @compiled_render
+    class MainPage(Component):
+        def render(self):
+            return DIV(
+                SPAN({"class": "bold", "style": f"background-color: {self.props['color']};"},
+                    "Hello world!"
+                ),
+                *self.children
+            )
+
+    Instances whose prop values are not non-empty str or non-zero numbers, and
+    classes whose render() cannot be traced, are rendered the normal way.
+
+    The plan is traced by calling render() on instances whose prop values are marker
+    strings, so render() must have no side effects, and must not branch on the prop
+    values: only the first instance is checked against a normal render, a later
+    instance taking another branch gets the html of the traced one.
+    """
+    cls.cyo_template = Template()
+    return cls
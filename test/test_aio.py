@@ -0,0 +1,99 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import asyncio
+import time
+
+import pytest
+
+from pycoyote.component import DIV, H1, LI, SPAN, UL, Component, get_virtual_dom
+from pycoyote.cache import memoized_render
+from pycoyote.aio import render_async
+
+DELAY = 0.05
+
+
+class FakeDatabase:
+    """A data source that takes DELAY seconds to answer, and counts the queries
+    """
+    def __init__(self):
+        self.queries = 0
+
+    async def get(self, key):
+        self.queries += 1
+        await asyncio.sleep(DELAY)
+        return f"value of {key}"
+
+
+db = FakeDatabase()
+
+
+class Value(Component):
+    async def render(self):
+        return SPAN({"class": "value"}, await db.get(self.props["key"]))
+
+
+class Widget(Component):
+    async def render(self):
+        title = await db.get(f"title {self.props['id']}")
+        return DIV({"class": "widget"}, H1(title), Value({"key": self.props["id"]}))
+
+
+class Dashboard(Component):
+    def render(self):
+        return DIV(UL(*[LI(Widget({"id": i})) for i in range(30)]), *self.children)
+
+
+class SyncWidget(Component):
+    def render(self):
+        return [SPAN("sync"), "<text>"]
+
+
+@memoized_render
+class Header(Component):
+    def render(self):
+        return H1(self.props["title"])
+
+
+class SyncDashboard(Component):
+    def render(self):
+        return DIV(Header({"title": "Report"}), SyncWidget(), SyncWidget())
+
+
+def test_render_async_concurrent():
+    db.queries = 0
+    start = time.perf_counter()
+    out = asyncio.run(render_async(Dashboard(Value({"key": "footer"}))))
+    elapsed = time.perf_counter() - start
+    assert db.queries == 61
+    # 3 levels of fetches, each one waits for the slowest widget only
+    assert elapsed < DELAY * 10
+    assert out.startswith(
+        '<div><ul><li><div class="widget"><h1>value of title 0</h1>'
+        '<span class="value">value of 0</span></div></li>'
+    )
+    assert out.endswith('</ul><span class="value">value of footer</span></div>')
+
+
+def test_render_async_sync_components():
+    dashboard = SyncDashboard()
+    assert asyncio.run(render_async(dashboard)) == str(dashboard)
+    # Header comes from the cache now
+    assert asyncio.run(render_async(dashboard)) == str(dashboard)
+    assert Header.cyo_render_cache.hits >= 1
+
+
+def test_str_of_async_component():
+    with pytest.raises(TypeError):
+        str(Dashboard())
+    with pytest.raises(TypeError, match="render_async"):
+        get_virtual_dom([DIV(Value({"key": 1}))])
+
+
+def test_render_async_lazy_children():
+    db.queries = 0
+    page = DIV(UL(LI(Value({"key": i})) for i in range(5)), (Value({"key": i}) for i in range(5, 7)))
+    out = asyncio.run(render_async(page))
+    assert db.queries == 7
+    assert out.startswith('<div><ul><li><span class="value">value of 0</span></li>')
+    assert out.endswith('<span class="value">value of 6</span></div>')
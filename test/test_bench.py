@@ -0,0 +1,36 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import json
+
+import pytest
+
+from pycoyote import bench
+
+# a single render of tiny trees, to check the command line and not time anything
+QUICK = ["--scale", "0.001", "--repeat", "1", "--number", "1"]
+
+
+def test_bench(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    assert bench.main([*QUICK, "--save", str(baseline)]) == 0
+    results = json.loads(baseline.read_text())["results"]
+    assert set(results) == set(bench.WORKLOADS)
+    for result in results.values():
+        assert result["nodes"] > 0 and result["ops_per_sec"] > 0 and result["peak_bytes"] > 0
+
+    # much faster baseline, every workload is a regression
+    for result in results.values():
+        result["ops_per_sec"] *= 100
+    baseline.write_text(json.dumps({"results": results}))
+    capsys.readouterr()
+    assert bench.main(["wide_table", *QUICK, "--baseline", str(baseline)]) == 1
+    assert "slower than the baseline: wide_table" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit):
+        bench.main(["no_such_workload"])
+
+
+def test_count_nodes():
+    # TABLE, THEAD, TR, 10 TH with text, TBODY, TR, 10 TD with text but the first one is 0
+    assert bench.count_nodes(bench.wide_table(0.0001)) == 3 + 10 * 2 + 2 + 10 * 2 - 1
@@ -0,0 +1,190 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import time
+
+import pytest
+
+from pycoyote.component import DIV, P, SPAN, Component
+from pycoyote.cache import FragmentCache, MemoryBackend, RenderCache, SqliteBackend, \
+    fragment_cached, memoized_render
+
+
+class Cell(Component):
+    render_count = 0
+
+    def render(self):
+        Cell.render_count += 1
+        return SPAN({"class": self.props["kind"]}, *self.children)
+
+
+@memoized_render
+class MemoizedCell(Cell):
+    pass
+
+
+@memoized_render(maxsize=2)
+class SmallCell(Cell):
+    pass
+
+
+def test_render_cache_lru():
+    cache = RenderCache(maxsize=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"
+    cache.set("c", "3")
+    # b is the least recently used one
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert len(cache) == 2
+    assert cache.hits == 3
+    assert cache.misses == 1
+
+
+def test_render_cache_ttl():
+    cache = RenderCache(ttl=0.01)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_memoized_render():
+    MemoizedCell.cyo_render_cache.clear()
+    Cell.render_count = 0
+    page = DIV(*[MemoizedCell({"kind": "odd" if i % 2 else "even"}, "x") for i in range(100)])
+    expected = "<div>" + "".join(
+        f'<span class="{"odd" if i % 2 else "even"}">x</span>' for i in range(100)
+    ) + "</div>"
+    assert str(page) == expected
+    assert Cell.render_count == 2
+    assert MemoizedCell.cyo_render_cache.hits == 98
+    assert MemoizedCell.cyo_render_cache.misses == 2
+
+    # the key covers props and children
+    assert str(MemoizedCell({"kind": "odd"}, P("y"))) == '<span class="odd"><p>y</p></span>'
+    assert str(MemoizedCell({"kind": "odd"}, 1)) == '<span class="odd">1</span>'
+    assert str(MemoizedCell({"kind": "odd"}, True)) == '<span class="odd">True</span>'
+    assert Cell.render_count == 5
+
+
+def test_memoized_render_bounded():
+    SmallCell.cyo_render_cache.clear()
+    for i in range(10):
+        assert str(SmallCell({"kind": i})) == f'<span class="{i}"></span>'
+    assert len(SmallCell.cyo_render_cache) == 2
+
+
+def test_memoized_render_unhashable_key():
+    MemoizedCell.cyo_render_cache.clear()
+    assert str(MemoizedCell({"kind": "a"}, bytearray(b"x"))) == \
+        '<span class="a">bytearray(b&#x27;x&#x27;)</span>'
+    assert MemoizedCell.cyo_render_cache.misses == 0
+
+
+def test_memoized_render_deep_tree():
+    MemoizedCell.cyo_render_cache.clear()
+    Cell.render_count = 0
+    tree = P("leaf")
+    for i in range(5000):
+        tree = DIV(tree)
+    expected = '<span class="deep">' + "<div>" * 5000 + "<p>leaf</p>" + "</div>" * 5000 + "</span>"
+    assert str(MemoizedCell({"kind": "deep"}, tree)) == expected
+    assert str(MemoizedCell({"kind": "deep"}, tree)) == expected
+    assert Cell.render_count == 1
+    assert MemoizedCell.cyo_render_cache.hits == 1
+
+    # the key tells apart the same items nested differently
+    assert MemoizedCell(P("a"), P("b")).cache_key() != MemoizedCell(P("a", P("b"))).cache_key()
+
+
+shared_backend = MemoryBackend(maxsize=100)
+
+
+@fragment_cached(shared_backend, ttl=60)
+class ProductCard(Component):
+    render_count = 0
+
+    def cache_key(self):
+        return f"product:{self.props['id']}"
+
+    def render(self):
+        ProductCard.render_count += 1
+        return DIV({"class": "card"}, self.props["name"])
+
+
+def test_fragment_cached():
+    shared_backend.clear()
+    ProductCard.render_count = 0
+    assert str(ProductCard({"id": 1, "name": "a"})) == '<div class="card">a</div>'
+    # same key, so the cached fragment is used even though name changed
+    assert str(ProductCard({"id": 1, "name": "b"})) == '<div class="card">a</div>'
+    assert ProductCard.render_count == 1
+    assert ProductCard.cyo_render_cache.hits == 1
+
+    assert ProductCard.cyo_render_cache.invalidate("product:") == 1
+    assert str(ProductCard({"id": 1, "name": "b"})) == '<div class="card">b</div>'
+    assert ProductCard.render_count == 2
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda tmp_path: MemoryBackend(),
+    lambda tmp_path: SqliteBackend(str(tmp_path / "fragments.db")),
+])
+def test_fragment_cache_backends(tmp_path, make_backend):
+    cache = FragmentCache(make_backend(tmp_path))
+    cache.set("user:1:card", "<b>1</b>")
+    cache.set("user:1:nav", "<b>2</b>")
+    cache.set("user:10:card", "<b>3</b>")
+    cache.set("user_1", "<b>4</b>")
+    assert cache.get("user:1:card") == "<b>1</b>"
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(cache) == 4
+
+    assert cache.invalidate("user:1:") == 2
+    assert cache.get("user:1:card") is None
+    assert cache.get("user:10:card") == "<b>3</b>"
+    assert cache.get("user_1") == "<b>4</b>"
+
+    expiring = FragmentCache(cache.backend, ttl=0.01)
+    expiring.set("short", "x")
+    assert expiring.get("short") == "x"
+    time.sleep(0.02)
+    assert expiring.get("short") is None
+
+
+def test_sqlite_backend_is_shared(tmp_path):
+    path = str(tmp_path / "fragments.db")
+    SqliteBackend(path).set("a", "1", None)
+    assert SqliteBackend(path).get("a") == "1"
+
+    # keys without a stable digest are never cached
+    backend = SqliteBackend(path)
+    backend.set(("a", object()), "2", None)
+    assert len(backend) == 1
+
+
+def test_sqlite_backend_default_key(tmp_path):
+    backend = SqliteBackend(str(tmp_path / "fragments.db"))
+
+    @fragment_cached(backend)
+    class Badge(Component):
+        render_count = 0
+
+        def render(self):
+            Badge.render_count += 1
+            return SPAN({"class": "badge"}, self.props["text"], *self.children)
+
+    assert str(Badge({"text": "new"}, P(1))) == '<span class="badge">new<p>1</p></span>'
+    assert str(Badge({"text": "new"}, P(1))) == '<span class="badge">new<p>1</p></span>'
+    assert Badge.render_count == 1
+    assert str(Badge({"text": "new"}, P(1.0))) == '<span class="badge">new<p>1.0</p></span>'
+    assert Badge.render_count == 2
+    assert str(Badge({"text": "new"})) == '<span class="badge">new</span>'
+    assert Badge({"text": "new"}).to_html(minify=True) == '<span class=badge>new</span>'
+    assert Badge.render_count == 4
+    assert len(backend) == 4
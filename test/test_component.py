@@ -1,9 +1,16 @@
 # !/usr/bin/python
 # -*- coding: UTF-8 -*-
 
+import html
+import io
+import json
+
 import pytest
 
-from pycoyote.component import _is_primitive, _is_non_primitive, DIV, P, Component, get_virtual_dom
+from pycoyote.component import _is_primitive, _is_non_primitive, DIV, P, BR, INPUT, Component, get_virtual_dom, \
+    iter_html, static, SafeHTML, SELF_CLOSING_TAGS, register_prop_serializer, unregister_prop_serializer, \
+    serialize_aria_prop, serialize_boolean_prop, serialize_json_prop, _prop_cache, SPAN, TABLE, TBODY, TD, TR, \
+    IMG, LI, PRE, UL, PrimitiveComponent
 
 
 class MyComponent(Component):
@@ -177,3 +184,528 @@ def test_get_virtual_dom():
             ),
         ]
     )
+
+
+def _legacy_physical_dom(element):
+    # the original string building serializer, kept as a reference for the output format
+    out = element.get_start_tag()
+    if len(element.children) == 0 and element.cyo_tag.upper() in SELF_CLOSING_TAGS:
+        return f"{out} />"
+    out += ">"
+    for child in element.children:
+        if _is_primitive(child):
+            out += _legacy_physical_dom(child)
+        elif not child:
+            pass
+        else:
+            out += html.escape(str(child))
+    out += f"</{element.cyo_tag}>"
+    return out
+
+
+def _legacy_str(component):
+    return "".join([
+        _legacy_physical_dom(vdom) for vdom in get_virtual_dom([component])
+    ])
+
+
+class MyTestComponent7(Component):
+    # a component with props, nested components and escaped content
+    def render(self):
+        return DIV({"class": ["a", "b"], "style": {"color": self.props["color"]}},
+            MyTestComponent6(),
+            "x<y",
+            MyTestComponent4(),
+            *self.children
+        )
+
+
+def test_str_matches_virtual_dom_pipeline():
+    for component in [
+        MyTestComponent2(),
+        MyTestComponent3(),
+        MyTestComponent4(),
+        MyTestComponent5(),
+        MyTestComponent6(),
+        MyTestComponent7({"color": "'red'"}, P("a&b"), MyTestComponent3(), None, 0),
+    ]:
+        assert str(component) == _legacy_str(component)
+
+
+def test_iter_html():
+    component = MyTestComponent7({"color": "red"}, P("a&b"), MyTestComponent3())
+    expected = str(component)
+
+    chunks = list(iter_html(component, chunk_size=1))
+    assert len(chunks) > 1
+    assert "".join(chunks) == expected
+
+    chunks = list(iter_html(component, chunk_size=16))
+    assert all(len(chunk) >= 16 for chunk in chunks[:-1])
+    assert "".join(chunks) == expected
+
+    assert list(iter_html(component, chunk_size=len(expected) + 1)) == [expected]
+
+
+def test_iter_html_is_lazy():
+    rendered = []
+
+    class Row(Component):
+        def render(self):
+            rendered.append(self.props["i"])
+            return P(self.props["i"])
+
+    chunks = iter_html(DIV(*[Row({"i": i}) for i in range(3)]), chunk_size=1)
+    assert next(chunks) == "<div>"
+    assert rendered == []
+    assert next(chunks) == "<p></p>"
+    assert rendered == [0]
+
+
+def test_get_physical_dom_matches_reference():
+    div = DIV({"class": ["a", "b"], "x": "<1>"},
+        P("foo", None, "a>b"),
+        DIV(BR(), DIV(DIV("deep"))),
+        BR({"y": 2}),
+    )
+    assert div.get_physical_dom() == _legacy_physical_dom(div)
+
+
+class EmptyComponent(Component):
+    def render(self):
+        return []
+
+
+def test_void_elements_with_children():
+    div = DIV(BR(None), IMG(EmptyComponent()), BR(EmptyComponent(), None), IMG(EmptyComponent(), EmptyComponent()))
+    assert str(div) == _legacy_str(div) == "<div><br></br><img /><br></br><img /></div>"
+    assert str(IMG(iter([]))) == "<img />"
+    assert str(IMG(EmptyComponent(), "x")) == "<img>x</img>"
+    assert IMG(EmptyComponent()).get_physical_dom(minify=True) == "<img>"
+
+
+def test_render_to():
+    component = MyTestComponent7({"color": "red"}, P("a&b"))
+    writer = io.StringIO()
+    component.render_to(writer, chunk_size=4)
+    assert writer.getvalue() == str(component)
+
+
+def test_static():
+    footer = static(DIV({"class": "footer"}, P("a<b"), BR()), "x&y")
+    assert str(DIV(footer, footer)) == \
+        '<div><div class="footer"><p>a&lt;b</p><br /></div>x&amp;y<div class="footer"><p>a&lt;b</p><br /></div>x&amp;y</div>'
+    assert str(static()) == ""
+
+    with pytest.raises(ValueError):
+        static(DIV(MyTestComponent2()))
+
+
+def test_primitive_component_is_compact():
+    div = DIV({"x": 1}, "foo")
+    assert not hasattr(div, "__dict__")
+    assert DIV.cyo_tag == "div"
+    assert DIV.cyo_is_primitive is True
+    assert MyComponent.cyo_is_primitive is False
+    assert div.children == ("foo", )
+    assert DIV().children == ()
+
+
+def test_get_virtual_dom_shares_static_subtrees():
+    static_p = P("foo")
+    static_div = DIV(static_p)
+    dynamic_div = DIV(MyTestComponent2())
+    root = DIV(static_div, dynamic_div)
+
+    vdom = get_virtual_dom([root])
+    assert len(vdom) == 1
+    # the path to the non-primitive component is cloned, the rest is shared
+    assert vdom[0] is not root
+    assert vdom[0].children[0] is static_div
+    assert static_div.children[0] is static_p
+    assert vdom[0].children[1] is not dynamic_div
+    assert_same_element(vdom[0].children[1], DIV(DIV({"x": 1}, "foo")))
+
+    # the original tree is left alone, so it renders the same every time
+    assert isinstance(dynamic_div.children[0], MyTestComponent2)
+    assert str(root) == _legacy_str(root)
+    assert str(root) == _legacy_str(root)
+
+    static_vdom = get_virtual_dom([static_div])
+    assert static_vdom == [static_div]
+
+
+def test_get_virtual_dom_several_changes():
+    root = DIV(DIV(MyTestComponent2()), P("x"), DIV(MyTestComponent2()), DIV(DIV(MyTestComponent3())))
+    vdom = get_virtual_dom([root])
+    assert_same_elements(vdom, [
+        DIV(DIV(DIV({"x": 1}, "foo")), P("x"), DIV(DIV({"x": 1}, "foo")), DIV(DIV(DIV({"x": 1}, "foo"))))
+    ])
+    assert vdom[0].children[1] is root.children[1]
+    assert str(root) == "".join(element.get_physical_dom() for element in vdom)
+
+
+def test_deep_tree():
+    depth = 10000
+    tree = MyTestComponent2()
+    for i in range(depth):
+        tree = DIV(tree)
+    expected = "<div>" * depth + '<div x="1">foo</div>' + "</div>" * depth
+    assert str(tree) == expected
+    assert "".join(iter_html(tree)) == expected
+
+    vdom = get_virtual_dom([tree])
+    assert vdom[0].get_physical_dom() == expected
+
+
+def test_prop_serializers():
+    register_prop_serializer("disabled", serialize_boolean_prop)
+    register_prop_serializer("aria-*", serialize_aria_prop)
+    register_prop_serializer("data-*", serialize_json_prop)
+    try:
+        assert str(INPUT({"disabled": True, "aria-hidden": False, "data-config": {"a": [1, "<"]}})) == \
+            '<input disabled="" aria-hidden="false" data-config="{&quot;a&quot;: [1, &quot;&lt;&quot;]}" />'
+        assert str(INPUT({"disabled": False, "aria-label": "a&b", "data-id": "x"})) == \
+            '<input aria-label="a&amp;b" data-id="x" />'
+    finally:
+        unregister_prop_serializer("disabled")
+        unregister_prop_serializer("aria-*")
+        unregister_prop_serializer("data-*")
+    assert str(INPUT({"disabled": True, "data-id": 1})) == '<input disabled="True" data-id="1" />'
+
+
+def test_prop_cache():
+    _prop_cache.clear()
+    assert str(DIV({"class": ["a", "b"], "style": {"color": "red"}, "x": 1})) == \
+        '<div class="a b" style="color:red" x="1"></div>'
+    assert len(_prop_cache) == 3
+    # values that are equal but render differently are kept apart
+    assert str(DIV({"x": True, "y": 1.0})) == '<div x="True" y="1.0"></div>'
+    assert str(DIV({"class": [1], "y": {}})) == '<div class="1" y="{}"></div>'
+    assert str(DIV({"class": [True], "y": []})) == '<div class="True" y="[]"></div>'
+    # unhashable values are serialized without the cache
+    assert str(DIV({"x": set(), "y": bytearray(b"<")})) == '<div x="set()" y="bytearray(b&#x27;&lt;&#x27;)"></div>'
+
+
+def test_text_children():
+    assert str(DIV("a<b", 1, 2.5, None, False, 0, "", True, "&")) == "<div>a&lt;b12.5True&amp;</div>"
+    assert str(DIV(1, 2)) == "<div>12</div>"
+    assert str(DIV(P("x"), 3, "<")) == "<div><p>x</p>3&lt;</div>"
+    long_text = "<" * 100
+    assert str(DIV(long_text)) == "<div>" + "&lt;" * 100 + "</div>"
+    assert str(DIV(long_text)) == _legacy_str(DIV(long_text))
+
+
+class HtmlFragment:
+    # any object following the __html__ protocol
+    def __html__(self):
+        return "<b>bold</b>"
+
+
+def test_safe_html():
+    fragment = SafeHTML("<p>a &amp; b</p>")
+    assert fragment.__html__() is fragment
+    assert str(DIV(fragment, "<", fragment)) == "<div><p>a &amp; b</p>&lt;<p>a &amp; b</p></div>"
+    assert str(DIV(SafeHTML(""), "x")) == "<div>x</div>"
+    assert str(DIV(HtmlFragment(), P("x"))) == "<div><b>bold</b><p>x</p></div>"
+    assert str(DIV(HtmlFragment())) == "<div><b>bold</b></div>"
+
+    component = MyTestComponent7({"color": "red"})
+    assert component.__html__() == str(component)
+    assert str(DIV(SafeHTML(str(component)))) == str(DIV(component))
+
+
+def test_markupsafe():
+    markupsafe = pytest.importorskip("markupsafe")
+    component = MyTestComponent2()
+    assert markupsafe.escape(component) == '<div x="1">foo</div>'
+    assert str(DIV(markupsafe.Markup("<i>x</i>"), "<")) == "<div><i>x</i>&lt;</div>"
+
+
+class LazyItem(Component):
+    def render(self):
+        return SPAN({"class": "item"}, self.props["name"])
+
+
+def test_lazy_children():
+    def rows(count, produced):
+        for i in range(count):
+            produced.append(i)
+            yield TR(TD(i), TD(LazyItem({"name": f"row {i}"})))
+
+    expected = str(TABLE(TBODY(*rows(3, []))))
+    assert str(TABLE(TBODY(rows(3, [])))) == expected
+    assert str(TABLE(TBODY(map(str, range(3)), "x", (c for c in "<>")))) == \
+        "<table><tbody>012x&lt;&gt;</tbody></table>"
+    # nested lazy children, and lazy children rendered by a component
+    assert str(DIV(iter([iter([SPAN(1)]), "a"]))) == "<div><span>1</span>a</div>"
+
+    # rows are produced while the html is streamed
+    produced = []
+    chunks = iter_html(TABLE(TBODY(rows(1000, produced))), chunk_size=100)
+    next(chunks)
+    assert 0 < len(produced) < 1000
+    assert "".join(chunks).endswith("</tbody></table>")
+    assert len(produced) == 1000
+
+    # the virtual dom holds them in lists
+    vdom = get_virtual_dom([TABLE(TBODY(rows(3, [])))])
+    assert "".join(element.get_physical_dom() for element in vdom) == expected
+    assert len(vdom[0].children[0].children) == 3
+
+
+def test_lazy_children_are_not_cached():
+    table = TBODY(iter([TR(TD(1))]))
+    assert table.cache_key() is None
+
+
+class MutatingComponent(Component):
+    cyo_copy_props = True
+
+    def render(self):
+        self.props["rendered"] = True
+        return SPAN(self.props.get("name", "none"))
+
+
+def test_props_are_not_copied():
+    props = {"class": "x"}
+    element = DIV(props, "a", SPAN())
+    assert element.props is props
+    assert element.children[0] == "a"
+    clone = element.clone()
+    assert clone is not element and clone.__class__ is DIV
+    assert clone.props is props and clone.children is element.children
+    # without props, elements share a read-only empty dict
+    assert SPAN().props is SPAN("x").props
+    assert isinstance(SPAN().props, dict) and json.dumps(SPAN().props) == "{}"
+    for change in [
+        lambda props: props.__setitem__("class", "x"),
+        lambda props: props.update({"class": "x"}),
+        lambda props: props.setdefault("class", "x"),
+    ]:
+        with pytest.raises(TypeError, match="cyo_copy_props"):
+            change(SPAN().props)
+    assert SPAN().props == {}
+    assert str(DIV(SPAN().props, "a")) == "<div>a</div>"
+    assert str(DIV({**element.props, "id": 1}, *element.children)) == '<div class="x" id="1">a<span></span></div>'
+
+    # the compatibility path for components mutating their props
+    props = {"name": "a"}
+    component = MutatingComponent(props)
+    assert component.props is not props
+    assert str(component) == "<span>a</span>" and "rendered" not in props
+    assert str(MutatingComponent()) == "<span>none</span>"
+
+
+def test_pickle():
+    import pickle
+    element = DIV({"class": "x"}, SPAN(), "text", MyTestComponent2())
+    restored = pickle.loads(pickle.dumps(element))
+    assert str(restored) == str(element)
+    assert restored.children[0].props is SPAN().props
+
+
+class TitledComponent(Component):
+    # no __slots__, its own attributes are in __dict__
+    def __init__(self, *children):
+        super().__init__(*children)
+        self.title = self.props.setdefault("title", "untitled").upper()
+
+    def render(self):
+        return SPAN({"title": self.title}, *self.children)
+
+
+def test_copy_and_pickle_keep_attributes():
+    import copy
+    import pickle
+
+    props = {"title": "a"}
+    component = TitledComponent(props, P("x"))
+    # a class with its own __init__ copies its props, even the empty ones
+    assert component.props is not props
+    assert TitledComponent().props == {"title": "untitled"}
+    for restored in [
+        copy.copy(component),
+        copy.deepcopy(component),
+        pickle.loads(pickle.dumps(component)),
+    ]:
+        assert restored is not component
+        assert restored.title == "A"
+        assert restored.props == {"title": "a"}
+        assert str(restored) == str(component) == '<span title="A"><p>x</p></span>'
+    assert pickle.loads(pickle.dumps(TitledComponent())).title == "UNTITLED"
+
+
+class SlottedTitle(Component):
+    # its own attributes are in __slots__
+    __slots__ = ("title", )
+
+    def __init__(self, *children):
+        super().__init__(*children)
+        self.title = "untitled"
+
+    def render(self):
+        return SPAN({"title": self.title}, *self.children)
+
+
+def test_copy_and_pickle_keep_slots():
+    import copy
+    import pickle
+
+    component = SlottedTitle(P("x"))
+    component.title = "A"
+    for restored in [
+        copy.copy(component),
+        copy.deepcopy(component),
+        pickle.loads(pickle.dumps(component)),
+    ]:
+        assert restored is not component
+        assert restored.title == "A"
+        assert str(restored) == str(component) == '<span title="A"><p>x</p></span>'
+    element = SPAN("x")
+    for restored in [copy.copy(element), copy.deepcopy(element), pickle.loads(pickle.dumps(element))]:
+        assert restored.props is element.props
+
+
+def test_tag_classes():
+    import pickle
+    import pycoyote
+    import pycoyote.component as component
+
+    assert pycoyote.VIDEO is component.VIDEO
+    assert component.VIDEO.cyo_tag == "video" and component.VIDEO.__module__ == "pycoyote.component"
+    assert issubclass(component.VIDEO, component.PrimitiveComponent)
+    assert str(pycoyote.H1({"class": "title"}, "x")) == '<h1 class="title">x</h1>'
+    assert "MENUITEM" in dir(component) and "MENUITEM" in dir(pycoyote)
+    assert "MENUITEM" in pycoyote.__all__ and "render_async" in pycoyote.__all__
+    namespace = {}
+    exec("from pycoyote.component import *", namespace)
+    assert namespace["WBR"] is component.WBR and namespace["Component"] is Component
+    assert all(name in namespace for name in component._TAGS)
+    restored = pickle.loads(pickle.dumps(component.TRACK({"kind": "captions"})))
+    assert restored.__class__ is component.TRACK
+    with pytest.raises(AttributeError):
+        component.BLINK
+    with pytest.raises(AttributeError):
+        pycoyote.no_such_name
+    from pycoyote import RenderRoot, render_threaded
+    assert RenderRoot.__module__ == "pycoyote.root"
+
+
+class LegacyWidget(PrimitiveComponent):
+    # a custom element declared the way it was before cyo_tag
+    def __init__(self, *children):
+        super().__init__("my-widget", *children)
+
+
+class UntaggedWidget(PrimitiveComponent):
+    __slots__ = ()
+
+
+def test_custom_tag_passed_to_init():
+    import pickle
+
+    widget = LegacyWidget({"class": "x"}, "a", SPAN())
+    assert widget.cyo_tag == "my-widget" and widget.children[0] == "a"
+    assert str(widget) == '<my-widget class="x">a<span></span></my-widget>'
+    assert str(LegacyWidget()) == "<my-widget></my-widget>"
+    assert str(pickle.loads(pickle.dumps(widget))) == str(widget)
+    # get_virtual_dom clones it, as the parent of a non-primitive component
+    wrapper = LegacyWidget(MyTestComponent2())
+    assert get_virtual_dom([wrapper])[0].cyo_tag == "my-widget"
+    assert str(wrapper) == _legacy_str(wrapper)
+
+    with pytest.raises(TypeError, match="cyo_tag"):
+        UntaggedWidget("my-widget")
+    with pytest.raises(TypeError, match="cyo_tag"):
+        PrimitiveComponent("my-widget")
+
+
+def test_minify():
+    import pycoyote.component as c
+
+    def minify(element):
+        return element.get_physical_dom(minify=True)
+
+    # optional end tags
+    assert minify(c.UL(c.LI("a"), c.LI("b"))) == "<ul><li>a<li>b</ul>"
+    assert minify(c.UL(c.LI("a"), " ", c.LI("b"))) == "<ul><li>a</li> <li>b</ul>"
+    assert minify(c.DIV(c.P("a"), c.P("b"), c.SPAN("c"))) == "<div><p>a<p>b</p><span>c</span></div>"
+    assert minify(c.DIV(c.P("a"), c.HR())) == "<div><p>a<hr></div>"
+    assert minify(c.A({"href": "/"}, c.P("a"))) == "<a href=/><p>a</p></a>"
+    assert minify(c.DL(c.DT("t"), c.DD("d"), c.DT("t"))) == "<dl><dt>t<dd>d<dt>t</dt></dl>"
+    assert minify(c.TABLE(c.THEAD(c.TR(c.TH("h"))), c.TBODY(c.TR(c.TD(1), c.TD(2)), c.TR(c.TD(3))))) == \
+        "<table><thead><tr><th>h<tbody><tr><td>1<td>2<tr><td>3</table>"
+    assert minify(c.SELECT(c.OPTION({"value": "1"}, "a"), c.OPTION("b"))) == "<select><option value=1>a<option>b</select>"
+    # what comes after a top-level element is unknown
+    assert minify(c.P("a")) == "<p>a</p>"
+    assert minify(c.DIV(c.P("a"), SafeHTML("<b>x</b>"))) == "<div><p>a</p><b>x</b></div>"
+
+    class Custom(c.PrimitiveComponent):
+        __slots__ = ()
+        cyo_tag = "my-widget"
+
+    assert minify(Custom(c.P("a"))) == "<my-widget><p>a</p></my-widget>"
+
+    # attributes
+    assert minify(c.INPUT({"type": "checkbox", "checked": True, "value": "", "name": "a b", "title": "x=1"})) == \
+        '<input type=checkbox checked value name="a b" title="x=1">'
+    assert minify(c.DIV({"class": ["a", "b"], "id": "x", "hidden": "until-found", "data-q": '"'})) == \
+        '<div class="a b" id=x hidden=until-found data-q=&quot;></div>'
+    register_prop_serializer("disabled", serialize_boolean_prop)
+    try:
+        assert minify(c.BUTTON({"disabled": True}, "go")) == "<button disabled>go</button>"
+    finally:
+        unregister_prop_serializer("disabled")
+
+    # whitespace
+    assert minify(c.DIV("  a \n\t b  ", c.SPAN(" c  d "))) == "<div> a b <span> c d </span></div>"
+    assert minify(c.DIV(c.PRE("  a\n  b", c.B("  c  ")), c.TEXTAREA("  x  "))) == \
+        "<div><pre>  a\n  b<b>  c  </b></pre><textarea>  x  </textarea></div>"
+    assert minify(c.SCRIPT("if (a  <  b) {\n}")) == "<script>if (a  &lt;  b) {\n}</script>"
+
+
+class MinifyItem(Component):
+    def render(self):
+        return LI({"class": "item"}, f"  {self.props['name']}  ")
+
+
+class MinifyPage(Component):
+    def render(self):
+        return DIV(UL(*[MinifyItem({"name": i}) for i in range(3)]), *self.children)
+
+
+def test_minify_entry_points():
+    page = MinifyPage((MinifyItem({"name": i}) for i in range(3, 5)))
+    expected = '<div><ul><li class=item> 0 <li class=item> 1 <li class=item> 2 </ul><li class=item> 3 ' \
+        '<li class=item> 4 </div>'
+    assert page.to_html(minify=True) == expected
+    page = MinifyPage()
+    assert page.to_html() == str(page)
+    assert "".join(iter_html(page, chunk_size=10, minify=True)) == page.to_html(minify=True)
+    writer = io.StringIO()
+    page.render_to(writer, minify=True)
+    assert writer.getvalue() == page.to_html(minify=True)
+
+
+def test_minify_cache_and_template():
+    from pycoyote.cache import memoized_render
+    from pycoyote.template import compiled_render
+
+    @memoized_render
+    class Cached(Component):
+        def render(self):
+            return P({"class": "x"}, "  a  ")
+
+    @compiled_render
+    class Compiled(Component):
+        def render(self):
+            return DIV({"class": "y"}, P(self.props["text"]))
+
+    page = DIV(Cached(), Compiled({"text": "b  c"}), PRE(Cached()))
+    plain = str(page)
+    minified = page.to_html(minify=True)
+    assert minified == '<div><p class=x> a </p><div class=y><p>b c</div><pre><p class="x">  a  </p></pre></div>'
+    assert page.to_html(minify=True) == minified
+    assert str(page) == plain
+    assert len(Cached.cyo_render_cache) == 2
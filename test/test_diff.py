@@ -0,0 +1,151 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import html
+from html.parser import HTMLParser
+
+from pycoyote.component import BR, DIV, LI, P, SPAN, UL, Component, SafeHTML, SELF_CLOSING_TAGS, get_virtual_dom
+from pycoyote.diff import diff
+
+
+class Node:
+    # a minimal dom, enough to apply patches and serialize them back the way pycoyote does
+    def __init__(self, tag, attributes):
+        self.tag = tag
+        self.attributes = dict(attributes)
+        self.children = []
+
+    def __str__(self):
+        out = f"<{self.tag}" + "".join(
+            f' {name}="{html.escape(value)}"' for name, value in self.attributes.items()
+        )
+        if not self.children and self.tag.upper() in SELF_CLOSING_TAGS:
+            return out + " />"
+        return out + ">" + "".join(
+            html.escape(child) if isinstance(child, str) else str(child) for child in self.children
+        ) + f"</{self.tag}>"
+
+
+class FragmentParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.stack = [Node("root", {})]
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, attrs)
+        self.stack[-1].children.append(node)
+        if tag.upper() not in SELF_CLOSING_TAGS:
+            self.stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].children.append(Node(tag, attrs))
+
+    def handle_endtag(self, tag):
+        self.stack.pop()
+
+    def handle_data(self, data):
+        children = self.stack[-1].children
+        if children and isinstance(children[-1], str):
+            children[-1] += data
+        else:
+            children.append(data)
+
+
+def parse(fragment):
+    parser = FragmentParser()
+    parser.feed(fragment)
+    parser.close()
+    return parser.stack[0].children
+
+
+def apply(root, patches):
+    def get_node(path):
+        node = root
+        for i in path:
+            node = node.children[i]
+        return node
+
+    for patch in patches:
+        op, path = patch[0], patch[1]
+        if op == "replace":
+            get_node(path[:-1]).children[path[-1]:path[-1] + 1] = parse(patch[2])
+        elif op == "set_attribute":
+            get_node(path).attributes[patch[2]] = html.unescape(patch[3])
+        elif op == "remove_attribute":
+            del get_node(path).attributes[patch[2]]
+        elif op == "insert":
+            get_node(path).children[patch[2]:patch[2]] = parse(patch[3])
+        elif op == "remove":
+            del get_node(path).children[patch[2]]
+        elif op == "move":
+            children = get_node(path).children
+            children.insert(patch[3], children.pop(patch[2]))
+        elif op == "set_html":
+            get_node(path).children = parse(patch[2])
+        else:
+            raise ValueError(op)
+
+
+def check(old, new):
+    old_vdom = get_virtual_dom([old])
+    new_vdom = get_virtual_dom([new])
+    root = Node("root", {})
+    root.children = parse(str(old))
+    patches = diff(old_vdom, new_vdom)
+    apply(root, patches)
+    assert "".join(str(child) if isinstance(child, Node) else html.escape(child) for child in root.children) == str(new)
+    return patches
+
+
+class Item(Component):
+    def render(self):
+        return LI({"key": self.props["id"], "class": "item"}, f"item {self.props['id']}")
+
+
+def test_diff_nothing_changed():
+    page = DIV({"class": "a"}, P("x", 1), UL(*[Item({"id": i}) for i in range(3)]))
+    assert check(page, page) == []
+
+
+def test_diff_attributes_and_text():
+    patches = check(
+        DIV({"class": "a", "title": "t"}, P("hello ", "world"), SPAN("x")),
+        DIV({"class": ["a", "b"], "id": "main"}, P("hello ", "there"), SPAN("x")),
+    )
+    assert patches == [
+        ("set_attribute", (0, ), "class", "a b"),
+        ("set_attribute", (0, ), "id", "main"),
+        ("remove_attribute", (0, ), "title"),
+        ("replace", (0, 0, 0), "hello there"),
+    ]
+
+
+def test_diff_replace_insert_remove():
+    patches = check(DIV(P("a"), SPAN("b"), P("c")), DIV(P("a"), P("b"), P("c"), BR()))
+    assert patches == [
+        ("replace", (0, 1), "<p>b</p>"),
+        ("insert", (0, ), 3, "<br />"),
+    ]
+    patches = check(DIV(P("a"), P("b"), "text"), DIV(P("a")))
+    assert patches == [("remove", (0, ), 2), ("remove", (0, ), 1)]
+
+
+def test_diff_keyed_children():
+    old = UL(*[Item({"id": i}) for i in [1, 2, 3, 4]])
+    patches = check(old, UL(*[Item({"id": i}) for i in [4, 1, 3, 5]]))
+    assert patches == [
+        ("move", (0, ), 3, 0),
+        ("move", (0, ), 3, 2),
+        ("insert", (0, ), 3, '<li key="5" class="item">item 5</li>'),
+        ("remove", (0, ), 4),
+    ]
+
+    check(old, UL(*[Item({"id": i}) for i in [3, 2, 1]]))
+    check(old, UL(P("header"), *[Item({"id": i}) for i in [2, 4]], "footer"))
+    check(UL("a", P("b")), UL(*[Item({"id": i}) for i in [1, 2]]))
+
+
+def test_diff_safe_html():
+    patches = check(DIV(P(SafeHTML("<b>a</b>"))), DIV(P(SafeHTML("<b>b</b>"), "c")))
+    assert patches == [("set_html", (0, 0), "<b>b</b>c")]
+    assert check(DIV(SafeHTML("<b>a</b>")), DIV(SafeHTML("<b>a</b>"))) == []
@@ -0,0 +1,117 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+
+import pytest
+
+import pycoyote
+from pycoyote.component import DIV, LI, SPAN, UL, Component, iter_html, register_render_hook, \
+    unregister_render_hook
+from pycoyote.aio import render_async
+from pycoyote.parallel import render_parallel, render_threaded
+from pycoyote.root import RenderRoot
+
+
+class Item(Component):
+    def render(self):
+        return LI(SPAN(self.props["name"]))
+
+
+class Page(Component):
+    def render(self):
+        return DIV(UL(*[Item({"name": f"item {i}"}) for i in range(3)]))
+
+
+@pytest.fixture
+def events():
+    events = []
+    hooks = {
+        "on_render_start": lambda elements: events.append(("start", elements)),
+        "on_render_end": lambda elements, elapsed, size: events.append(("end", elements, elapsed, size)),
+        "on_component_render": lambda component, elapsed: events.append(("component", component, elapsed)),
+    }
+    for event, callback in hooks.items():
+        register_render_hook(event, callback)
+    yield events
+    for event, callback in hooks.items():
+        unregister_render_hook(event, callback)
+
+
+def test_render_hooks(events):
+    page = Page()
+    out = str(page)
+    assert [event[0] for event in events] == ["start", "component", "component", "component", "component", "end"]
+    assert events[0] == ("start", [page])
+    assert events[1][1] is page
+    assert [event[1].props["name"] for event in events[2:5]] == ["item 0", "item 1", "item 2"]
+    assert all(event[2] >= 0 for event in events[1:5])
+    _, elements, elapsed, size = events[-1]
+    assert elements == [page] and elapsed >= 0 and size == len(out)
+
+    del events[:]
+    writer = io.StringIO()
+    page.render_to(writer)
+    assert writer.getvalue() == out
+    assert len(events) == 6
+
+    # works along with the profiler
+    del events[:]
+    with pycoyote.profile() as stats:
+        assert "".join(iter_html(page)) == out
+    assert len(events) == 6
+    assert stats.to_dict()["Item"]["instances"] == 3
+
+
+def test_several_render_hooks(events):
+    calls = []
+
+    def on_component_render(component, elapsed):
+        calls.append(component)
+
+    register_render_hook("on_component_render", on_component_render)
+    unregister_render_hook("on_component_render", calls.append)  # not registered, ignored
+    str(Page())
+    unregister_render_hook("on_component_render", on_component_render)
+    str(Page())
+    assert len(calls) == 4
+    assert len([event for event in events if event[0] == "component"]) == 8
+
+
+def test_no_render_hooks():
+    page = Page()
+    out = str(page)
+    calls = []
+    register_render_hook("on_render_start", calls.append)
+    unregister_render_hook("on_render_start", calls.append)
+    assert str(page) == out
+    assert calls == []
+    with pytest.raises(ValueError):
+        register_render_hook("on_render", calls.append)
+
+
+def test_render_hooks_of_other_entry_points(events):
+    page = Page()
+    out = str(page)
+    root = RenderRoot(page)
+    with ThreadPoolExecutor(2) as executor:
+        for render in [
+            root.html,
+            lambda: asyncio.run(render_async(page)),
+            lambda: render_threaded(page, executor),
+            lambda: render_parallel(page, executor, min_children=2, batch_size=1),
+        ]:
+            del events[:]
+            assert render() == out
+            assert events[0] == ("start", [page])
+            assert [event[0] for event in events[1:]] == ["component"] * 4 + ["end"]
+            assert sorted(event[1].__class__.__name__ for event in events[1:5]) == ["Item"] * 3 + ["Page"]
+            _, elements, elapsed, size = events[-1]
+            assert elements == [page] and elapsed >= 0 and size == len(out)
+
+    # what did not change is not rendered again
+    del events[:]
+    assert root.html() == out
+    assert [event[0] for event in events] == ["start", "end"]
@@ -0,0 +1,76 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import time
+
+import pytest
+
+from pycoyote.component import DIV, SPAN, TABLE, TBODY, TD, TR, UL, LI, Component
+from pycoyote.parallel import render_parallel, render_threaded
+
+
+class Row(Component):
+    def render(self):
+        return TR({"class": "row"}, *[TD(self.props["i"] * j) for j in range(5)])
+
+
+class Report(Component):
+    def render(self):
+        return DIV(
+            TABLE(TBODY(*[Row({"i": i}) for i in range(self.props["rows"])])),
+            UL(*[LI(i) for i in range(3)]),
+        )
+
+
+def test_render_parallel_processes():
+    report = Report({"rows": 500})
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert render_parallel(report, executor, min_children=100, batch_size=64) == str(report)
+
+
+def test_render_parallel_threads():
+    report = Report({"rows": 50})
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert render_parallel(report, executor, min_children=10) == str(report)
+        assert render_parallel(report, executor, min_children=3, batch_size=1) == str(report)
+        # nothing wide enough to split
+        assert render_parallel(report, executor, min_children=1000) == str(report)
+
+
+class SlowWidget(Component):
+    def render(self):
+        time.sleep(0.05)
+        return DIV({"class": "widget"}, SlowValue({"value": self.props["i"]}))
+
+
+class SlowValue(Component):
+    def render(self):
+        time.sleep(0.05)
+        return [SPAN(self.props["value"]), "&"]
+
+
+class SlowDashboard(Component):
+    def render(self):
+        return DIV(UL(*[LI(SlowWidget({"i": i})) for i in range(20)]), Row({"i": 3}))
+
+
+def test_render_threaded():
+    dashboard = SlowDashboard()
+    expected = str(dashboard)
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        start = time.perf_counter()
+        assert render_threaded(dashboard, executor) == expected
+        # 2 levels of sleeps, overlapped within a level
+        assert time.perf_counter() - start < 0.5
+    assert render_threaded(Report({"rows": 5})) == str(Report({"rows": 5}))
+
+
+class AsyncWidget(Component):
+    async def render(self):
+        return SPAN("async")
+
+
+def test_render_threaded_async_component():
+    with pytest.raises(TypeError, match="render_async"):
+        render_threaded(DIV(AsyncWidget()))
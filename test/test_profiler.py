@@ -0,0 +1,66 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import io
+import time
+
+import pycoyote
+from pycoyote.component import DIV, H1, LI, SPAN, UL, Component, iter_html
+from pycoyote.cache import memoized_render
+
+
+class Item(Component):
+    def render(self):
+        return LI({"class": "item"}, self.props["name"], SPAN("é"))
+
+
+class Slow(Component):
+    def render(self):
+        time.sleep(0.02)
+        return SPAN("slow")
+
+
+@memoized_render
+class Title(Component):
+    def render(self):
+        return H1(self.props["text"])
+
+
+class Page(Component):
+    def render(self):
+        return DIV(Title({"text": "Items"}), UL(*[Item({"name": f"item {i}"}) for i in range(3)]), Slow())
+
+
+def test_profile():
+    page = Page()
+    expected = str(page)
+    with pycoyote.profile() as stats:
+        assert str(page) == expected
+    assert "".join(iter_html(page)) == expected
+
+    result = stats.to_dict()
+    assert set(result) == {"Page", "Title", "Item", "Slow"}
+    assert result["Item"]["instances"] == 3
+    assert result["Page"]["instances"] == 1
+    # DIV and UL are nodes of Page, the components in them are not
+    assert result["Page"]["nodes"] == 2
+    # LI, the text, SPAN and its text
+    assert result["Item"]["nodes"] == 12
+    assert result["Item"]["bytes"] == len('<li class="item">item 0<span>é</span></li>'.encode("utf-8")) * 3
+    assert result["Title"]["bytes"] == len("<h1>Items</h1>")
+    assert result["Slow"]["render_time"] >= 0.02
+    assert result["Page"]["render_time"] < 0.02
+
+    lines = dict(line.rsplit(" ", 1) for line in stats.to_collapsed().splitlines())
+    assert set(lines) == {"html", "html;Page", "html;Page;Title", "html;Page;Item", "html;Page;Slow"}
+    assert int(lines["html;Page;Slow"]) >= 20000
+
+
+def test_profile_inactive():
+    with pycoyote.profile() as stats:
+        pass
+    page = Page()
+    out = io.StringIO()
+    page.render_to(out)
+    assert out.getvalue() == str(page)
+    assert stats.to_dict() == {}
@@ -0,0 +1,126 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+import pytest
+
+from pycoyote.component import DIV, H1, P, SPAN, Component, static
+from pycoyote.cache import memoized_render
+from pycoyote.root import RenderRoot
+
+render_counts = {}
+
+
+def count(name):
+    render_counts[name] = render_counts.get(name, 0) + 1
+
+
+class Value(Component):
+    def render(self):
+        count("Value")
+        return SPAN({"class": "value"}, self.props["value"])
+
+
+class Widget(Component):
+    def render(self):
+        count("Widget")
+        return DIV({"class": "widget"}, H1(self.props["title"]), Value({"value": self.props["value"]}))
+
+
+@memoized_render
+class Header(Component):
+    def render(self):
+        count("Header")
+        return H1(self.props["title"])
+
+
+class Dashboard(Component):
+    def render(self):
+        count("Dashboard")
+        return DIV(
+            Header({"title": "Dashboard"}),
+            *[Widget({"title": f"w{i}", "value": i}) for i in range(self.props["count"])],
+        )
+
+
+def test_render_root():
+    full = str(Dashboard({"count": 50}))
+    render_counts.clear()
+    root = RenderRoot(Dashboard({"count": 50}))
+    assert str(root) == full
+    assert render_counts == {"Dashboard": 1, "Widget": 50, "Value": 50}
+
+    render_counts.clear()
+    assert root.html() == full
+    assert render_counts == {}
+
+    widgets = list(root.components(Widget))
+    assert [widget.props["title"] for widget in widgets] == [f"w{i}" for i in range(50)]
+    root.update(widgets[7], {"value": "changed"})
+    expected = full.replace(
+        '<span class="value">7</span>', '<span class="value">changed</span>'
+    )
+    render_counts.clear()
+    assert root.html() == expected
+    assert render_counts == {"Widget": 1, "Value": 1}
+
+    # the descendants were rendered again, so they are new components
+    value = next(widget for widget in root.components(Value) if widget.props["value"] == "changed")
+    root.update(value, {"value": "again"})
+    render_counts.clear()
+    assert root.html() == expected.replace("changed", "again")
+    assert render_counts == {"Value": 1}
+
+    root.update(next(root.components(Dashboard)), {"count": 2})
+    assert root.html() == str(Dashboard({"count": 2}))
+    assert len(list(root.components(Widget))) == 2
+
+
+footer = static(P({"class": "footer"}, "footer"))
+shared_value = Value({"value": 1})
+
+
+class SharedPage(Component):
+    # the same instances appear twice
+    def render(self):
+        return DIV(footer, shared_value, Widget({"title": "w", "value": self.props["value"]}), shared_value, footer)
+
+
+def test_render_root_shared_components():
+    root = RenderRoot(SharedPage({"value": 0}))
+    assert str(root) == str(SharedPage({"value": 0}))
+    assert list(root.components(Value)).count(shared_value) == 2
+
+    root.update(next(root.components(SharedPage)), {"value": 2})
+    assert str(root) == str(SharedPage({"value": 2}))
+
+    root.update(shared_value, {"value": 9})
+    expected = str(SharedPage({"value": 2}))
+    assert expected.count('<span class="value">9</span>') == 2
+    render_counts.clear()
+    assert str(root) == expected
+    assert render_counts == {"Value": 2}
+
+
+class Nested(Component):
+    def render(self):
+        depth = self.props["depth"]
+        if depth == 0:
+            return SPAN("leaf")
+        return DIV(Nested({"depth": depth - 1}))
+
+
+def test_render_root_deep_tree():
+    root = RenderRoot(Nested({"depth": 3000}))
+    assert root.html() == str(Nested({"depth": 3000}))
+    leaf = next(component for component in root.components(Nested) if component.props["depth"] == 0)
+    root.update(leaf, {"depth": 1})
+    assert root.html() == str(Nested({"depth": 3001}))
+
+
+def test_render_root_errors():
+    with pytest.raises(TypeError):
+        RenderRoot(DIV())
+    root = RenderRoot(Dashboard({"count": 1}))
+    root.html()
+    with pytest.raises(ValueError):
+        root.update(Widget({"title": "x", "value": 1}), {"value": 2})
@@ -0,0 +1,134 @@
+# !/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+from pycoyote.component import DIV, LI, P, SPAN, UL, Component, register_render_hook, unregister_render_hook
+from pycoyote.template import compiled_render
+
+
+class MainPage(Component):
+    def render(self):
+        return DIV(
+            SPAN({"class": "bold", "style": f"background-color: {self.props['color']};"},
+                "Hello world!"
+            ),
+            *self.children
+        )
+
+
+@compiled_render
+class CompiledMainPage(MainPage):
+    pass
+
+
+class Item(Component):
+    def render(self):
+        return LI({"title": self.props["title"]}, self.props["title"], " (", self.props["count"], ")")
+
+
+@compiled_render
+class CompiledItem(Item):
+    pass
+
+
+class List(Component):
+    # the structure depends on the number of children
+    def render(self):
+        return UL(*[LI(child) for child in self.children])
+
+
+@compiled_render
+class CompiledList(List):
+    pass
+
+
+class Shout(Component):
+    # the prop value is transformed
+    def render(self):
+        return P(self.props["text"].upper())
+
+
+@compiled_render
+class CompiledShout(Shout):
+    pass
+
+
+class Badge(Component):
+    # the prop value is used in arithmetic
+    def render(self):
+        return SPAN(self.props["count"] + 1)
+
+
+@compiled_render
+class CompiledBadge(Badge):
+    pass
+
+
+class Status(Component):
+    # the structure depends on the prop value
+    def render(self):
+        if self.props["state"] == "done":
+            return P({"class": "done"}, "Done")
+        return SPAN(self.props["state"])
+
+
+@compiled_render
+class CompiledStatus(Status):
+    pass
+
+
+def test_compiled_render():
+    for props, children in [
+        ({"color": "green"}, [DIV("Example ends here")]),
+        ({"color": "<red>'"}, [P("a"), CompiledMainPage({"color": "blue"})]),
+        ({"color": "green"}, []),
+        ({"color": ""}, [P("empty color")]),
+        ({"color": ["a", "b"]}, []),
+    ]:
+        assert str(CompiledMainPage(props, *children)) == str(MainPage(props, *children))
+
+    plans = CompiledMainPage.cyo_template._Template__plans
+    assert plans[(CompiledMainPage, ("color", ))] is not None
+
+
+def test_compiled_render_values():
+    for props in [
+        {"title": "a&b", "count": 3},
+        {"title": "x", "count": 1.5},
+        {"title": "x", "count": 0},
+        {"title": "x", "count": None},
+        {"title": "x", "count": True},
+        {"count": 3, "title": "x"},
+    ]:
+        assert str(CompiledItem(props)) == str(Item(props))
+
+
+def test_compiled_render_falls_back():
+    children = [P("a"), P("b"), P("c")]
+    assert str(CompiledList(*children)) == str(List(*children))
+    assert str(CompiledShout({"text": "hi"})) == str(Shout({"text": "hi"})) == "<p>HI</p>"
+    assert str(CompiledBadge({"count": 1})) == str(Badge({"count": 1})) == "<span>2</span>"
+
+    for cls, keys in [(CompiledList, ()), (CompiledShout, ("text", )), (CompiledBadge, ("count", ))]:
+        assert cls.cyo_template._Template__plans[(cls, keys)] is None
+
+
+def test_compiled_render_is_verified():
+    # the markers take the SPAN branch, the first real instance tells it is wrong
+    assert str(CompiledStatus({"state": "done"})) == str(Status({"state": "done"})) == '<p class="done">Done</p>'
+    assert CompiledStatus.cyo_template._Template__plans[(CompiledStatus, ("state", ))] is None
+    assert str(CompiledStatus({"state": "todo"})) == "<span>todo</span>"
+
+
+def test_compiled_render_hooks():
+    rendered = []
+
+    def on_component_render(component, elapsed):
+        rendered.append(component.__class__)
+
+    register_render_hook("on_component_render", on_component_render)
+    try:
+        str(CompiledShout({"text": "hi"}))
+        str(CompiledMainPage({"color": ""}))
+    finally:
+        unregister_render_hook("on_component_render", on_component_render)
+    assert rendered == [CompiledShout, CompiledMainPage]